@@ -5,22 +5,53 @@ Web application for Smartphone Price Tracker on Render.com
 Provides a simple web interface and API endpoints for monitoring.
 """
 
-from flask import Flask, jsonify, render_template_string, request
+from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
+import orjson
+import hashlib
 import os
 import sys
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+from sqlalchemy.orm import contains_eager
+
 from src.database import db_manager, PriceRecord, PhoneModel, Platform
 from src.analysis import PriceAnalyzer
-from src.utils import setup_logging, get_logger
+from src.utils import setup_logging, get_logger, ttl_cache
 from config.settings import settings
 
+# Naive datetimes keep their isoformat() form (no offset suffix); numpy scalars
+# come out of the analyzer
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (datetimes/floats encoded in C)"""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=str, option=ORJSON_OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class PriceTrackerFlask(Flask):
+    json_provider_class = ORJSONProvider
+
+
 # Initialize Flask app
-app = Flask(__name__)
+app = PriceTrackerFlask(__name__)
+
+# How long analyzer results are reused between requests. Scrapes land from the
+# worker service, so these TTLs are what bound staleness in every web worker
+INSIGHTS_CACHE_SECONDS = 300
+STATUS_CACHE_SECONDS = 60
+# Rows in the dashboard's recent price list
+RECENT_PRICES_LIMIT = 20
 
 # Setup logging
 setup_logging(log_level='INFO', log_file=None)
@@ -34,6 +65,21 @@ except Exception as e:
     logger.error(f"Database initialization failed: {e}")
 
 
+def _conditional_json(payload: dict, etag_data):
+    """JSON response with a content ETag; answers 304 when the client copy is current"""
+    etag = hashlib.blake2b(orjson.dumps(etag_data, default=str, option=ORJSON_OPTIONS),
+                           digest_size=16).hexdigest()
+    
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={STATUS_CACHE_SECONDS}'
+    return response
+
+
 @app.route('/health')
 def health_check():
     """Health check endpoint for Render"""
@@ -43,8 +89,9 @@ def health_check():
         
         return jsonify({
             'status': 'healthy' if db_healthy else 'unhealthy',
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': datetime.utcnow(),
             'database': 'connected' if db_healthy else 'disconnected',
+            'pool': db_manager.pool_status(),
             'version': '1.0.0'
         }), 200 if db_healthy else 503
     
@@ -53,97 +100,144 @@ def health_check():
         return jsonify({
             'status': 'error',
             'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }), 500
 
 
+def _query_recent_prices(session, limit: int = RECENT_PRICES_LIMIT) -> list:
+    """Newest price records with their phone model and platform loaded in the same query"""
+    return session.query(PriceRecord)\
+        .join(PhoneModel)\
+        .join(Platform)\
+        .options(
+            contains_eager(PriceRecord.phone_model),
+            contains_eager(PriceRecord.platform)
+        )\
+        .order_by(PriceRecord.scrape_timestamp.desc())\
+        .limit(limit).all()
+
+
 @app.route('/')
 def dashboard():
     """Simple dashboard showing recent activity"""
     try:
-        with db_manager.get_session() as session:
+        with db_manager.get_session(read_only=True) as session:
             # Get basic stats
-            total_records = session.query(PriceRecord).count()
-            recent_records = session.query(PriceRecord).filter(
-                PriceRecord.scrape_timestamp >= datetime.utcnow() - timedelta(days=7)
-            ).count()
-            
-            total_models = session.query(PhoneModel).filter(PhoneModel.is_active == True).count()
-            total_platforms = session.query(Platform).filter(Platform.is_active == True).count()
+            stats = db_manager.get_record_stats(session)
             
             # Get recent price records
-            recent_prices = session.query(PriceRecord)\
-                .join(PhoneModel)\
-                .join(Platform)\
-                .order_by(PriceRecord.scrape_timestamp.desc())\
-                .limit(20).all()
-        
-        return render_template_string(DASHBOARD_TEMPLATE, 
-            total_records=total_records,
-            recent_records=recent_records,
-            total_models=total_models,
-            total_platforms=total_platforms,
-            recent_prices=recent_prices,
-            now=datetime.utcnow()
-        )
+            recent_prices = _query_recent_prices(session)
+            
+            # Render while the session is open so relationships stay attached
+            return _DASHBOARD.render(
+                total_records=stats['total_records'],
+                recent_records=stats['recent_records'],
+                total_models=stats['active_models'],
+                total_platforms=stats['active_platforms'],
+                recent_prices=recent_prices,
+                now=datetime.utcnow()
+            )
     
     except Exception as e:
         logger.error(f"Dashboard error: {e}")
         return f"Error loading dashboard: {e}", 500
 
 
+@ttl_cache(timeout=STATUS_CACHE_SECONDS)
+def get_status_stats() -> dict:
+    """Record/model/platform counters, memoized briefly for pollers"""
+    with db_manager.get_session(read_only=True) as session:
+        return db_manager.get_record_stats(session)
+
+
 @app.route('/api/status')
 def api_status():
     """API endpoint for system status"""
     try:
-        with db_manager.get_session() as session:
-            stats = {
-                'total_records': session.query(PriceRecord).count(),
-                'recent_records': session.query(PriceRecord).filter(
-                    PriceRecord.scrape_timestamp >= datetime.utcnow() - timedelta(days=7)
-                ).count(),
-                'active_models': session.query(PhoneModel).filter(PhoneModel.is_active == True).count(),
-                'active_platforms': session.query(Platform).filter(Platform.is_active == True).count(),
-                'last_updated': datetime.utcnow().isoformat()
-            }
+        stats = get_status_stats()
         
-        return jsonify(stats)
+        # ETag covers the counters only, so an unchanged status yields 304
+        return _conditional_json({**stats, 'last_updated': datetime.utcnow()}, stats)
     
     except Exception as e:
         logger.error(f"API status error: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@ttl_cache(timeout=STATUS_CACHE_SECONDS)
+def get_recent_prices() -> list:
+    """The dashboard's recent price list as plain dicts, memoized briefly for pollers"""
+    with db_manager.get_session(read_only=True) as session:
+        return [{
+            'brand': price.phone_model.brand,
+            'model_name': price.phone_model.model_name,
+            'storage_capacity': price.phone_model.storage_capacity,
+            'condition': price.condition,
+            'platform': price.platform.name,
+            'price': price.price,
+            'currency': price.currency,
+            'scrape_timestamp': price.scrape_timestamp
+        } for price in _query_recent_prices(session)]
+
+
+@app.route('/api/recent-prices')
+def api_recent_prices():
+    """API endpoint for the most recent price records"""
+    try:
+        prices = get_recent_prices()
+        
+        return _conditional_json({'prices': prices, 'count': len(prices)}, prices)
+    
+    except Exception as e:
+        logger.error(f"API recent prices error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@ttl_cache(timeout=INSIGHTS_CACHE_SECONDS)
+def get_market_insights(min_profit_percent: float = 5.0,
+                        min_change_percent: float = 5.0,
+                        top_n: int = 5,
+                        limit: int = 20) -> list:
+    """Run the analyzer insight queries; results are memoized per argument set"""
+    with db_manager.get_session(read_only=True) as session:
+        analyzer = PriceAnalyzer(session)
+        
+        # Each source is capped at `limit` so nothing past the cut gets built
+        insights = []
+        insights.extend(analyzer.find_arbitrage_opportunities(
+            min_profit_percent=min_profit_percent, limit=limit
+        ))
+        insights.extend(analyzer.find_significant_price_changes(
+            min_change_percent=min_change_percent, limit=limit
+        ))
+        insights.extend(analyzer.find_best_deals(top_n=min(top_n, limit)))
+        
+        return insights[:limit]
+
+
 @app.route('/api/insights')
 def api_insights():
     """API endpoint for market insights"""
     try:
-        with db_manager.get_session() as session:
-            analyzer = PriceAnalyzer(session)
-            
-            # Get insights
-            insights = []
-            insights.extend(analyzer.find_arbitrage_opportunities(min_profit_percent=5.0))
-            insights.extend(analyzer.find_significant_price_changes(min_change_percent=5.0))
-            insights.extend(analyzer.find_best_deals(top_n=5))
-            
-            # Convert to JSON serializable format
-            insights_data = [{
-                'type': insight.insight_type,
-                'title': insight.title,
-                'description': insight.description,
-                'phone_model': insight.phone_model,
-                'platform': insight.platform,
-                'region': insight.region,
-                'value': insight.value,
-                'confidence': insight.confidence
-            } for insight in insights[:20]]  # Limit to 20 insights
-            
-            return jsonify({
-                'insights': insights_data,
-                'count': len(insights_data),
-                'generated_at': datetime.utcnow().isoformat()
-            })
+        insights = get_market_insights(min_profit_percent=5.0, min_change_percent=5.0, top_n=5, limit=20)
+        
+        # Convert to JSON serializable format
+        insights_data = [{
+            'type': insight.insight_type,
+            'title': insight.title,
+            'description': insight.description,
+            'phone_model': insight.phone_model,
+            'platform': insight.platform,
+            'region': insight.region,
+            'value': insight.value,
+            'confidence': insight.confidence
+        } for insight in insights]
+        
+        return _conditional_json({
+            'insights': insights_data,
+            'count': len(insights_data),
+            'generated_at': datetime.utcnow()
+        }, insights_data)
     
     except Exception as e:
         logger.error(f"API insights error: {e}")
@@ -169,7 +263,7 @@ def trigger_scrape():
             'message': 'Scraping task queued',
             'region': region,
             'platform': platform,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         })
     
     except Exception as e:
@@ -285,19 +379,19 @@ DASHBOARD_TEMPLATE = """
         
         <div class="stats-grid">
             <div class="stat-card">
-                <div class="stat-number">{{ "{:,}".format(total_records) }}</div>
+                <div class="stat-number" data-stat="total_records">{{ "{:,}".format(total_records) }}</div>
                 <div class="stat-label">Total Price Records</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{{ "{:,}".format(recent_records) }}</div>
+                <div class="stat-number" data-stat="recent_records">{{ "{:,}".format(recent_records) }}</div>
                 <div class="stat-label">Records This Week</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{{ total_models }}</div>
+                <div class="stat-number" data-stat="active_models">{{ total_models }}</div>
                 <div class="stat-label">Phone Models Tracked</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{{ total_platforms }}</div>
+                <div class="stat-number" data-stat="active_platforms">{{ total_platforms }}</div>
                 <div class="stat-label">Platforms Monitored</div>
             </div>
         </div>
@@ -306,10 +400,11 @@ DASHBOARD_TEMPLATE = """
             <h3>📡 API Endpoints</h3>
             <a href="/api/status" class="api-link">System Status</a>
             <a href="/api/insights" class="api-link">Market Insights</a>
+            <a href="/api/recent-prices" class="api-link">Recent Prices</a>
             <a href="/health" class="api-link">Health Check</a>
         </div>
         
-        <div class="recent-activity">
+        <div class="recent-activity" id="recent-prices">
             <h3>🕐 Recent Price Records</h3>
             {% for price in recent_prices %}
             <div class="activity-item">
@@ -329,15 +424,50 @@ DASHBOARD_TEMPLATE = """
     </div>
     
     <script>
-        // Auto-refresh every 5 minutes
-        setTimeout(() => {
-            location.reload();
-        }, 5 * 60 * 1000);
+        // Mirrors the server-rendered activity item; textContent keeps the values escaped
+        function priceItem(price) {
+            const item = document.createElement('div');
+            item.className = 'activity-item';
+            const model = document.createElement('strong');
+            model.textContent = `${price.brand} ${price.model_name}`;
+            const platform = document.createElement('strong');
+            platform.textContent = price.platform;
+            const amount = document.createElement('span');
+            amount.className = 'price';
+            amount.textContent = `$${Number(price.price).toFixed(2)} ${price.currency}`;
+            const timestamp = document.createElement('div');
+            timestamp.className = 'timestamp';
+            timestamp.textContent = `${price.scrape_timestamp.slice(0, 16).replace('T', ' ')} UTC`;
+            item.append(model, ` (${price.storage_capacity}, ${price.condition}) on `,
+                        platform, ' - ', amount, timestamp);
+            return item;
+        }
+        
+        // Refresh the counters and recent prices in place every minute instead of reloading the page
+        setInterval(async () => {
+            try {
+                const [stats, recent] = await Promise.all([
+                    fetch('/api/status').then(response => response.json()),
+                    fetch('/api/recent-prices').then(response => response.json())
+                ]);
+                document.querySelectorAll('[data-stat]').forEach(el => {
+                    el.textContent = Number(stats[el.dataset.stat]).toLocaleString();
+                });
+                const list = document.getElementById('recent-prices');
+                list.querySelectorAll('.activity-item').forEach(el => el.remove());
+                list.append(...recent.prices.map(priceItem));
+            } catch (e) {
+                console.warn('Status refresh failed', e);
+            }
+        }, 60 * 1000);
     </script>
 </body>
 </html>
 """
 
+# Compile once at import instead of re-parsing the template on every request
+_DASHBOARD = app.jinja_env.from_string(DASHBOARD_TEMPLATE)
+
 
 if __name__ == '__main__':
     # For local development
@@ -9,20 +9,22 @@ import click
 import asyncio
 import sys
 import os
-from datetime import datetime, timedelta
-from typing import List, Optional
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, TYPE_CHECKING
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from config.settings import settings, PHONE_MODELS, PLATFORMS
+from config.settings import settings, PHONE_MODELS, PLATFORM_ENTRIES
 from src.database import init_database, db_manager, get_db_session
-from src.scrapers import ScraperFactory, PriceData
-from src.analysis import PriceAnalyzer, CurrencyConverter
-from src.reporting import EmailReporter, ChartGenerator
-from src.scheduler import TaskScheduler
 from src.utils import setup_logging, get_logger, TimedLogger
 
+# Scrapers, analysis, reporting and the scheduler are imported inside the
+# commands that use them so `--help` and `status` don't load matplotlib etc.
+if TYPE_CHECKING:
+    from src.scrapers import PriceData
+
 
 def setup_cli_logging():
     """Setup logging for CLI"""
@@ -83,21 +85,20 @@ def scrape(region, platform, model, dry_run, max_workers):
 async def _run_scraping(region: Optional[str], platform: Optional[str], 
                        model: Optional[str], dry_run: bool, max_workers: int):
     """Run the scraping process"""
+    from src.scrapers import ScraperFactory, create_http_session
+    
     logger = get_logger(__name__)
     
     # Filter platforms based on parameters
     platforms_to_scrape = {}
     
-    for region_name, region_platforms in PLATFORMS.items():
+    for region_name, platform_name, platform_config in PLATFORM_ENTRIES:
         if region and region_name != region:
             continue
+        if platform and platform_name.lower() != platform.lower():
+            continue
         
-        for platform_name, platform_config in region_platforms.items():
-            if platform and platform_name.lower() != platform.lower():
-                continue
-            
-            platform_config['region'] = region_name
-            platforms_to_scrape[platform_name] = platform_config
+        platforms_to_scrape[platform_name] = platform_config
     
     if not platforms_to_scrape:
         click.echo("❌ No platforms match the specified criteria")
@@ -115,36 +116,56 @@ async def _run_scraping(region: Optional[str], platform: Optional[str],
     
     click.echo(f"📱 Scraping {len(models_to_scrape)} phone models from {len(platforms_to_scrape)} platforms")
     
-    # Create scrapers and run
-    total_records = 0
+    # Scrape concurrently (bounded by --max-workers) over one shared keep-alive session;
+    # each in-flight fetch runs on an asyncio.to_thread worker, so size the pool to match
+    semaphore = asyncio.Semaphore(max_workers)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers + 1))
+    http_session = create_http_session(pool_maxsize=max_workers)
+    
+    async def _scrape_platform(platform_name: str, platform_config: dict):
+        async with semaphore:
+            click.echo(f"🔍 Scraping {platform_name} ({platform_config['region']})...")
+            scraper = ScraperFactory.create_scraper(platform_name, platform_config,
+                                                    http_session=http_session)
+            return await scraper.scrape_phone_prices(models_to_scrape)
+    
+    try:
+        results = await asyncio.gather(
+            *(_scrape_platform(name, config) for name, config in platforms_to_scrape.items()),
+            return_exceptions=True
+        )
+    finally:
+        http_session.close()
+    
+    # Collect every platform's records so they are saved in one transaction
+    all_price_data = []
+    
+    for (platform_name, platform_config), price_data in zip(platforms_to_scrape.items(), results):
+        click.echo(f"\n📦 {platform_name} ({platform_config['region']})")
+        
+        if isinstance(price_data, Exception):
+            logger.error(f"Error scraping {platform_name}: {price_data}")
+            click.echo(f"   ❌ Error: {price_data}")
+        elif price_data:
+            click.echo(f"   Found {len(price_data)} price records")
+            all_price_data.extend(price_data)
+        else:
+            click.echo(f"   ⚠️  No data found")
+    
+    total_records = len(all_price_data)
     successful_records = 0
     
-    for platform_name, platform_config in platforms_to_scrape.items():
-        try:
-            click.echo(f"\n🔍 Scraping {platform_name} ({platform_config['region']})...")
-            
-            scraper = ScraperFactory.create_scraper(platform_name, platform_config)
-            price_data = await scraper.scrape_phone_prices(models_to_scrape)
-            
-            if price_data:
-                click.echo(f"   Found {len(price_data)} price records")
-                total_records += len(price_data)
-                
-                if not dry_run:
-                    success = await _save_price_data(price_data)
-                    if success:
-                        successful_records += len(price_data)
-                        click.echo(f"   ✅ Saved {len(price_data)} records")
-                    else:
-                        click.echo(f"   ❌ Failed to save records")
-                else:
-                    click.echo(f"   🔍 Dry run - would save {len(price_data)} records")
+    if all_price_data:
+        if not dry_run:
+            # Run the blocking DB work off the event loop
+            success = await asyncio.to_thread(_save_price_data, all_price_data)
+            if success:
+                successful_records = total_records
+                click.echo(f"\n✅ Saved {total_records} records")
             else:
-                click.echo(f"   ⚠️  No data found")
-                
-        except Exception as e:
-            logger.error(f"Error scraping {platform_name}: {e}")
-            click.echo(f"   ❌ Error: {e}")
+                click.echo(f"\n❌ Failed to save records")
+        else:
+            click.echo(f"\n🔍 Dry run - would save {total_records} records")
     
     click.echo(f"\n📊 Scraping completed!")
     click.echo(f"   Total records found: {total_records}")
@@ -152,37 +173,45 @@ async def _run_scraping(region: Optional[str], platform: Optional[str],
         click.echo(f"   Successfully saved: {successful_records}")
 
 
-async def _save_price_data(price_data: List[PriceData]) -> bool:
+def _save_price_data(price_data: List['PriceData']) -> bool:
     """Save price data to database"""
+    from src.analysis import CurrencyConverter
+    
+    logger = get_logger(__name__)
+    
     try:
         with db_manager.get_session() as session:
+            from src.database import PhoneModel, Platform
+            
+            # Resolve lookups once per batch instead of once per row
+            phone_models = {
+                (m.brand, m.model_name, m.storage_capacity): m.id
+                for m in session.query(PhoneModel).all()
+            }
+            platforms = {(p.name, p.region): p.id for p in session.query(Platform).all()}
+            
+            converter = CurrencyConverter(session)
+            rates = converter.load_rates_as_dict(p.currency for p in price_data)
+            
             # Convert PriceData objects to database records
             records = []
             
             for price_item in price_data:
-                # Find phone model
-                phone_model = session.query(db_manager.PhoneModel).filter_by(
-                    brand=price_item.brand,
-                    model_name=price_item.phone_model,
-                    storage_capacity=price_item.storage
-                ).first()
+                phone_model_id = phone_models.get(
+                    (price_item.brand, price_item.phone_model, price_item.storage)
+                )
+                platform_id = platforms.get((price_item.platform, price_item.region))
                 
-                # Find platform
-                platform = session.query(db_manager.Platform).filter_by(
-                    name=price_item.platform,
-                    region=price_item.region
-                ).first()
-                
-                if phone_model and platform:
+                if phone_model_id and platform_id:
                     # Convert to USD if needed
                     price_usd = price_item.price
                     if price_item.currency != 'USD':
-                        converter = CurrencyConverter(session)
-                        price_usd = converter.convert_to_usd(price_item.price, price_item.currency)
+                        rate = rates.get(price_item.currency)
+                        price_usd = price_item.price / rate if rate else None
                     
                     record_data = {
-                        'phone_model_id': phone_model.id,
-                        'platform_id': platform.id,
+                        'phone_model_id': phone_model_id,
+                        'platform_id': platform_id,
                         'condition': price_item.condition,
                         'price': price_item.price,
                         'currency': price_item.currency,
@@ -205,10 +234,12 @@ async def _save_price_data(price_data: List[PriceData]) -> bool:
 @click.option('--output', type=click.Path(), help='Save analysis to file')
 def analyze(days, output):
     """Analyze price trends and generate insights"""
+    from src.analysis import PriceAnalyzer
+    
     logger = get_logger(__name__)
     
     with TimedLogger(logger, "price analysis"):
-        with db_manager.get_session() as session:
+        with db_manager.get_session(read_only=True) as session:
             analyzer = PriceAnalyzer(session)
             
             click.echo(f"📊 Analyzing price trends for the last {days} days...")
@@ -285,6 +316,9 @@ def _save_analysis_to_file(file_path: str, analyses, insights, summary):
 @click.option('--save-html', type=click.Path(), help='Also save HTML report to file')
 def report(recipient, subject, include_charts, save_html):
     """Generate and send email report"""
+    from src.analysis import PriceAnalyzer
+    from src.reporting import EmailReporter, ChartGenerator
+    
     logger = get_logger(__name__)
     
     with TimedLogger(logger, "report generation"):
@@ -294,7 +328,7 @@ def report(recipient, subject, include_charts, save_html):
             click.echo("❌ No email recipients specified")
             return
         
-        with db_manager.get_session() as session:
+        with db_manager.get_session(read_only=True) as session:
             # Generate analysis data
             analyzer = PriceAnalyzer(session)
             analyses = analyzer.analyze_price_trends()
@@ -311,7 +345,7 @@ def report(recipient, subject, include_charts, save_html):
             if include_charts:
                 click.echo("📊 Generating charts...")
                 chart_generator = ChartGenerator(session)
-                charts = chart_generator.generate_all_charts()
+                charts = chart_generator.generate_all_charts(output_format='png')
             
             # Create email reporter
             smtp_config = {
@@ -328,14 +362,20 @@ def report(recipient, subject, include_charts, save_html):
             click.echo("📧 Generating HTML report...")
             html_content = reporter.generate_weekly_report(analyses, insights, summary, charts)
             
-            # Save HTML file if requested
+            # Save HTML file if requested; the saved copy embeds charts as data: URIs
             if save_html:
-                reporter.save_report_to_file(html_content, save_html)
+                standalone_charts = {
+                    name: base64.b64encode(png).decode() if png else None
+                    for name, png in charts.items()
+                }
+                standalone_html = reporter.generate_weekly_report(analyses, insights, summary, standalone_charts)
+                reporter.save_report_to_file(standalone_html, save_html)
                 click.echo(f"💾 HTML report saved to {save_html}")
             
             # Send email
             click.echo(f"📨 Sending email to {len(recipients)} recipients...")
-            success = reporter.send_email_report(recipients, subject, html_content)
+            success = reporter.send_email_report(recipients, subject, html_content, inline_images=charts)
+            reporter.close()
             
             if success:
                 click.echo("✅ Email report sent successfully!")
@@ -354,6 +394,7 @@ def schedule(start, status, stop):
     if start:
         click.echo("🕒 Starting task scheduler...")
         
+        from src.scheduler import TaskScheduler
         scheduler = TaskScheduler()
         
         # Add weekly scraping task
@@ -403,23 +444,15 @@ def status():
         else:
             click.echo("❌ Database: Connection failed")
         
-        with db_manager.get_session() as session:
-            # Count records
-            from src.database import PriceRecord, PhoneModel, Platform
-            
-            total_records = session.query(PriceRecord).count()
-            total_models = session.query(PhoneModel).filter(PhoneModel.is_active == True).count()
-            total_platforms = session.query(Platform).filter(Platform.is_active == True).count()
-            
-            recent_records = session.query(PriceRecord).filter(
-                PriceRecord.scrape_timestamp >= datetime.utcnow() - timedelta(days=7)
-            ).count()
+        with db_manager.get_session(read_only=True) as session:
+            # Same prepared statement the web dashboard uses
+            stats = db_manager.get_record_stats(session, recent_days=7)
             
             click.echo(f"📊 Statistics:")
-            click.echo(f"   Total price records: {total_records:,}")
-            click.echo(f"   Records this week: {recent_records:,}")
-            click.echo(f"   Active phone models: {total_models}")
-            click.echo(f"   Active platforms: {total_platforms}")
+            click.echo(f"   Total price records: {stats['total_records']:,}")
+            click.echo(f"   Records this week: {stats['recent_records']:,}")
+            click.echo(f"   Active phone models: {stats['active_models']}")
+            click.echo(f"   Active platforms: {stats['active_platforms']}")
         
         # Test email configuration
         smtp_config = {
@@ -431,6 +464,7 @@ def status():
         }
         
         if smtp_config['smtp_username'] and smtp_config['smtp_password']:
+            from src.reporting import EmailReporter
             reporter = EmailReporter(smtp_config)
             if reporter.test_email_connection():
                 click.echo("✅ Email: Configuration valid")
@@ -1,10 +1,18 @@
-from typing import List, Dict, Any
-from pydantic import BaseSettings, validator
+from typing import Annotated, List, Dict, Any, Tuple
+from functools import lru_cache
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+from types import MappingProxyType
 import os
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+    
     database_url: str = "sqlite:///./price_tracker.db"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle: int = 1800
     
     # Email settings
     smtp_server: str = "smtp.gmail.com"
@@ -12,7 +20,7 @@ class Settings(BaseSettings):
     smtp_username: str = ""
     smtp_password: str = ""
     email_from: str = ""
-    email_to: str = ""
+    email_to: Annotated[Tuple[str, ...], NoDecode] = ()
     
     # API Keys
     ebay_client_id: str = ""
@@ -24,7 +32,7 @@ class Settings(BaseSettings):
     max_retries: int = 3
     timeout: int = 30
     use_proxy: bool = False
-    proxy_list: str = ""
+    proxy_list: Annotated[Tuple[str, ...], NoDecode] = ()
     
     # Redis settings
     redis_url: str = "redis://localhost:6379/0"
@@ -33,24 +41,37 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     log_file: str = "logs/price_tracker.log"
     
+    # Compiled Jinja2 templates persisted across processes
+    template_cache_dir: str = ".jinja_cache"
+    # PRICE_TRACKER_DEV=1 re-checks template files for edits on every load
+    price_tracker_dev: bool = False
+    
     # Application settings
     default_currency: str = "USD"
     price_change_threshold: float = 5.0
     max_price_records_per_model: int = 1000
     
-    @validator('email_to')
+    @field_validator('email_to', mode='before')
+    @classmethod
     def split_email_to(cls, v):
-        return [email.strip() for email in v.split(',') if email.strip()]
+        if isinstance(v, str):
+            return tuple(email.strip() for email in v.split(',') if email.strip())
+        return v
     
-    @validator('proxy_list')
+    @field_validator('proxy_list', mode='before')
+    @classmethod
     def split_proxy_list(cls, v):
         if not v:
-            return []
-        return [proxy.strip() for proxy in v.split(',') if proxy.strip()]
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+            return ()
+        if isinstance(v, str):
+            return tuple(proxy.strip() for proxy in v.split(',') if proxy.strip())
+        return v
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings, parsing the environment only once"""
+    return Settings()
 
 
 # Phone models configuration
@@ -75,6 +96,14 @@ PHONE_MODELS = {
     }
 }
 
+# Every "brand model storage" string to scrape, built once
+ALL_MODELS = tuple(
+    f"{brand} {model_name} {storage}"
+    for brand, models in PHONE_MODELS.items()
+    for model_name, storage_options in models.items()
+    for storage in storage_options
+)
+
 # Platform configuration
 PLATFORMS = {
     "US": {
@@ -152,6 +181,14 @@ PLATFORMS = {
     }
 }
 
+# Flat, read-only (region, platform_name, config) entries; each config
+# already carries its region so callers never mutate PLATFORMS
+PLATFORM_ENTRIES = tuple(
+    (region, platform_name, MappingProxyType({**config, "region": region}))
+    for region, platforms in PLATFORMS.items()
+    for platform_name, config in platforms.items()
+)
+
 # Currency configuration
 CURRENCIES = {
     "US": "USD",
@@ -163,4 +200,7 @@ CURRENCIES = {
 # Condition mapping
 CONDITIONS = ["Excellent", "Good", "Fair"]
 
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
+
+# Proxies handed to scrapers, resolved once (empty when proxies are disabled)
+PROXY_LIST_TUPLE = settings.proxy_list if settings.use_proxy else ()
\ No newline at end of file
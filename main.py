@@ -8,20 +8,25 @@ This module provides the main orchestration logic for the price tracking system.
 import asyncio
 import sys
 import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from config.settings import settings, PHONE_MODELS, PLATFORMS
-from src.database import init_database, db_manager
-from src.scrapers import ScraperFactory, PriceData
+from config.settings import settings, PLATFORM_ENTRIES, ALL_MODELS, PROXY_LIST_TUPLE
+from src.database import init_database, db_manager, PhoneModel, Platform, new_session_id
+from src.scrapers import ScraperFactory, PriceData, create_http_session
 from src.analysis import PriceAnalyzer, CurrencyConverter
 from src.reporting import EmailReporter, ChartGenerator
 from src.scheduler import AsyncTaskScheduler
 from src.utils import setup_logging, get_logger, TimedLogger
 
+# Platforms scraped at once; each in-flight fetch holds one to_thread worker
+SCRAPE_CONCURRENCY = 8
+
 
 class SmartphonePriceTracker:
     """Main application class for the smartphone price tracker"""
@@ -30,6 +35,13 @@ class SmartphonePriceTracker:
         self.logger = get_logger(__name__)
         self.scheduler = AsyncTaskScheduler()
         
+        # (brand, model_name, storage) / (name, region) -> id, reused across cycles
+        self._lookup_cache = None
+        
+        # Refreshed fallback rates carry across cycles; converters themselves are
+        # per session, since saving and maintenance can run at the same time
+        self._fallback_rates = CurrencyConverter(db_session=None).fallback_rates
+        
         # Initialize components
         self._init_logging()
         self._init_database()
@@ -54,6 +66,7 @@ class SmartphonePriceTracker:
             
             # Initialize default data
             db_manager.init_default_data()
+            self.invalidate_lookup_cache()
             
             self.logger.info("Database initialization completed")
             
@@ -65,46 +78,41 @@ class SmartphonePriceTracker:
         """Run a complete scraping cycle for all platforms and models"""
         self.logger.info("Starting full scraping cycle")
         
-        session_id = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        # Time-ordered UUID: unique per cycle and sorts chronologically
+        session_id = new_session_id()
         total_records = 0
         successful_records = 0
         failed_platforms = []
         
         with TimedLogger(self.logger, "full scraping cycle"):
             # Get all models to scrape
-            models_to_scrape = self._get_models_list()
+            models_to_scrape = ALL_MODELS
             
-            for region_name, region_platforms in PLATFORMS.items():
-                for platform_name, platform_config in region_platforms.items():
-                    try:
-                        platform_config['region'] = region_name
-                        
-                        self.logger.info(f"Scraping {platform_name} ({region_name})")
-                        
-                        # Create scraper
-                        proxy_list = settings.proxy_list if settings.use_proxy else []
-                        scraper = ScraperFactory.create_scraper(
-                            platform_name, platform_config, proxy_list
-                        )
-                        
-                        # Scrape prices
-                        price_data = await scraper.scrape_phone_prices(models_to_scrape)
-                        
-                        if price_data:
-                            total_records += len(price_data)
-                            
-                            # Save to database
-                            success_count = await self._save_price_data(price_data, session_id)
-                            successful_records += success_count
-                            
-                            self.logger.info(
-                                f"Scraped {len(price_data)} records from {platform_name}, "
-                                f"saved {success_count}"
-                            )
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error scraping {platform_name}: {e}")
-                        failed_platforms.append(platform_name)
+            # Platforms are independent, so scrape them concurrently
+            semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+            http_session = create_http_session()
+            
+            try:
+                results = await asyncio.gather(*(
+                    self._scrape_one(semaphore, http_session, region_name, platform_name,
+                                     platform_config, models_to_scrape)
+                    for region_name, platform_name, platform_config in PLATFORM_ENTRIES
+                ))
+            finally:
+                http_session.close()
+            
+            all_price_data = []
+            for platform_name, price_data, error in results:
+                if error:
+                    failed_platforms.append(platform_name)
+                elif price_data:
+                    all_price_data.extend(price_data)
+            
+            if all_price_data:
+                total_records = len(all_price_data)
+                
+                # Save to database in one batch
+                successful_records = await self._save_price_data(all_price_data, session_id)
         
         result = {
             'session_id': session_id,
@@ -121,70 +129,103 @@ class SmartphonePriceTracker:
         
         return result
     
-    def _get_models_list(self) -> List[str]:
-        """Get list of phone models to scrape"""
-        models = []
-        
-        for brand, brand_models in PHONE_MODELS.items():
-            for model_name, storage_options in brand_models.items():
-                for storage in storage_options:
-                    models.append(f"{brand} {model_name} {storage}")
+    async def _scrape_one(self, semaphore: asyncio.Semaphore, http_session, region_name: str,
+                          platform_name: str, platform_config: dict, models_to_scrape):
+        """Scrape a single platform, returning (platform_name, price_data, error)"""
+        async with semaphore:
+            try:
+                self.logger.info(f"Scraping {platform_name} ({region_name})")
+                
+                # Create scraper
+                scraper = ScraperFactory.create_scraper(
+                    platform_name, platform_config, PROXY_LIST_TUPLE,
+                    http_session=http_session
+                )
+                
+                # Scrape prices
+                price_data = await scraper.scrape_phone_prices(models_to_scrape)
+                self.logger.info(f"Scraped {len(price_data or [])} records from {platform_name}")
+                
+                return platform_name, price_data, None
+                
+            except Exception as e:
+                self.logger.error(f"Error scraping {platform_name}: {e}")
+                return platform_name, None, e
+    
+    def invalidate_lookup_cache(self):
+        """Drop cached phone model/platform ids after the reference tables change"""
+        self._lookup_cache = None
+    
+    def _get_lookup_maps(self, session):
+        """Get phone model and platform id lookups, loading them once"""
+        if self._lookup_cache is None:
+            models_by_key = {
+                (m.brand, m.model_name, m.storage_capacity): m.id
+                for m in session.query(PhoneModel).all()
+            }
+            platforms_by_key = {(p.name, p.region): p.id for p in session.query(Platform).all()}
+            self._lookup_cache = (models_by_key, platforms_by_key)
         
-        return models
+        return self._lookup_cache
+    
+    def _currency_converter(self, session) -> CurrencyConverter:
+        """Converter bound to one session, sharing the tracker's fallback rates"""
+        converter = CurrencyConverter(session)
+        converter.fallback_rates = self._fallback_rates
+        return converter
     
     async def _save_price_data(self, price_data: List[PriceData], session_id: str) -> int:
+        """Save price data on a worker thread so the event loop keeps running"""
+        return await asyncio.to_thread(self._save_price_data_sync, price_data, session_id)
+    
+    def _save_price_data_sync(self, price_data: List[PriceData], session_id: str) -> int:
         """Save price data to database and return count of successful saves"""
         try:
             with db_manager.get_session() as session:
-                converter = CurrencyConverter(session)
-                records = []
+                converter = self._currency_converter(session)
+                models_by_key, platforms_by_key = self._get_lookup_maps(session)
                 
-                for price_item in price_data:
-                    # Find phone model in database
-                    from src.database import PhoneModel, Platform
-                    
-                    phone_model = session.query(PhoneModel).filter_by(
-                        brand=price_item.brand,
-                        model_name=price_item.phone_model,
-                        storage_capacity=price_item.storage
-                    ).first()
-                    
-                    # Find platform in database
-                    platform = session.query(Platform).filter_by(
-                        name=price_item.platform,
-                        region=price_item.region
-                    ).first()
+                # Convert the whole batch to USD at once; a missing rate keeps
+                # the original price
+                rate_map = converter.load_rates_as_dict(p.currency for p in price_data)
+                count = len(price_data)
+                prices = np.fromiter((p.price for p in price_data), dtype=np.float64, count=count)
+                rates = np.fromiter((rate_map[p.currency] or 1.0 for p in price_data),
+                                    dtype=np.float64, count=count)
+                prices_usd = (prices / rates).tolist()
+                
+                # Local aliases keep attribute lookups out of the loop
+                get_model_id = models_by_key.get
+                get_platform_id = platforms_by_key.get
+                record_count = 0
+                
+                def iter_records():
+                    """Yield insertable rows, so only one insert chunk is held at a time"""
+                    nonlocal record_count
                     
-                    if phone_model and platform:
-                        # Convert price to USD
-                        price_usd = price_item.price
-                        if price_item.currency != 'USD':
-                            converted = converter.convert_to_usd(
-                                price_item.price, price_item.currency
-                            )
-                            if converted:
-                                price_usd = converted
+                    for item, price_usd in zip(price_data, prices_usd):
+                        phone_model_id = get_model_id((item.brand, item.phone_model, item.storage))
+                        platform_id = get_platform_id((item.platform, item.region))
                         
-                        record_data = {
-                            'phone_model_id': phone_model.id,
-                            'platform_id': platform.id,
-                            'condition': price_item.condition,
-                            'price': price_item.price,
-                            'currency': price_item.currency,
-                            'price_usd': price_usd,
-                            'availability': price_item.availability,
-                            'stock_count': price_item.stock_count,
-                            'product_url': price_item.product_url,
-                            'scrape_session_id': session_id
-                        }
-                        records.append(record_data)
+                        if phone_model_id and platform_id:
+                            record_count += 1
+                            yield {
+                                'phone_model_id': phone_model_id,
+                                'platform_id': platform_id,
+                                'condition': item.condition,
+                                'price': item.price,
+                                'currency': item.currency,
+                                'price_usd': price_usd,
+                                'availability': item.availability,
+                                'stock_count': item.stock_count,
+                                'product_url': item.product_url
+                            }
                 
                 # Save records
-                if records:
-                    success = db_manager.save_price_records(session, records, session_id)
-                    return len(records) if success else 0
-                
-                return 0
+                success = db_manager.save_price_records(
+                    session, iter_records(), session_id, chunk_size=500
+                )
+                return record_count if success else 0
                 
         except Exception as e:
             self.logger.error(f"Error saving price data: {e}")
@@ -195,7 +236,7 @@ class SmartphonePriceTracker:
         self.logger.info("Generating weekly report")
         
         try:
-            with db_manager.get_session() as session:
+            with db_manager.get_session(read_only=True) as session:
                 # Generate analysis
                 analyzer = PriceAnalyzer(session)
                 
@@ -214,7 +255,7 @@ class SmartphonePriceTracker:
                 if settings.email_from:  # Only generate charts if email is configured
                     with TimedLogger(self.logger, "chart generation"):
                         chart_generator = ChartGenerator(session)
-                        charts = chart_generator.generate_all_charts()
+                        charts = chart_generator.generate_all_charts(output_format='png')
                 
                 # Create and send email report
                 if settings.email_to and settings.smtp_username:
@@ -236,8 +277,9 @@ class SmartphonePriceTracker:
                     subject = f"Weekly Smartphone Price Report - {datetime.now().strftime('%B %d, %Y')}"
                     
                     success = reporter.send_email_report(
-                        settings.email_to, subject, html_content
+                        settings.email_to, subject, html_content, inline_images=charts
                     )
+                    reporter.close()
                     
                     if success:
                         self.logger.info("Weekly report sent successfully")
@@ -264,8 +306,11 @@ class SmartphonePriceTracker:
                 deleted_count = db_manager.cleanup_old_records(session, keep_days=90)
                 self.logger.info(f"Cleaned up {deleted_count} old price records")
                 
+                # Keep upcoming monthly partitions in place (no-op outside PostgreSQL)
+                db_manager.ensure_price_partitions()
+                
                 # Update currency rates
-                converter = CurrencyConverter(session)
+                converter = self._currency_converter(session)
                 converter.update_fallback_rates()
                 self.logger.info("Updated currency exchange rates")
         
@@ -324,6 +369,11 @@ app = create_app()
 
 async def main():
     """Main entry point"""
+    # Threads behind asyncio.to_thread: one per concurrent scraper fetch, plus DB work
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=SCRAPE_CONCURRENCY + min(4, os.cpu_count() or 4))
+    )
+    
     tracker = SmartphonePriceTracker()
     
     # Check if running with scheduler or once
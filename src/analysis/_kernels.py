@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in decorator so the kernels still run as plain Python without Numba"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, nogil=True)
+def trend_and_confidence(prices, timestamps_days):
+    """One pass over a time-ordered series: (slope, mean, std, min, max, days_span)"""
+    # Prices may be float32; every accumulator below is float64
+    n = prices.shape[0]
+    mean_x = 0.0
+    mean_y = 0.0
+    m2 = 0.0
+    cxy = 0.0
+    low = np.inf
+    high = -np.inf
+    first_day = np.inf
+    last_day = -np.inf
+
+    # Welford updates for the mean/variance and the x/y co-moment, x being the sample index
+    for i in range(n):
+        y = np.float64(prices[i])
+        dx = i - mean_x
+        dy = y - mean_y
+        mean_x += dx / (i + 1)
+        mean_y += dy / (i + 1)
+        m2 += dy * (y - mean_y)
+        cxy += dx * (y - mean_y)
+
+        if y < low:
+            low = y
+        if y > high:
+            high = y
+
+        day = timestamps_days[i]
+        if day < first_day:
+            first_day = day
+        if day > last_day:
+            last_day = day
+
+    # sum((x - mean(x))^2) over 0..n-1 is n(n^2 - 1)/12
+    slope = cxy / (n * (n * n - 1) / 12.0) if n > 1 else 0.0
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    days_span = np.floor(last_day - first_day) if n > 0 else 0.0
+
+    return slope, mean_y, std, low, high, days_span
+
+
+@njit(cache=True, nogil=True)
+def segment_trend_stats(prices, timestamps_days, starts, ends):
+    """Run trend_and_confidence over contiguous [start, end) segments; one row per segment"""
+    out = np.empty((starts.shape[0], 6))
+
+    for g in range(starts.shape[0]):
+        stats = trend_and_confidence(prices[starts[g]:ends[g]], timestamps_days[starts[g]:ends[g]])
+        for j in range(6):
+            out[g, j] = stats[j]
+
+    return out
+
+
+# Below this many combinations a single kernel call beats thread fan-out
+PARALLEL_MIN_SEGMENTS = 2048
+
+
+def parallel_segment_trend_stats(prices, timestamps_days, starts, ends, max_workers=None):
+    """Split the segments across threads; the compiled kernel releases the GIL"""
+    workers = max_workers or min(8, os.cpu_count() or 1)
+    if not NUMBA_AVAILABLE or workers < 2 or starts.shape[0] < PARALLEL_MIN_SEGMENTS:
+        return segment_trend_stats(prices, timestamps_days, starts, ends)
+
+    batches = zip(np.array_split(starts, workers), np.array_split(ends, workers))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='trend-kernel') as pool:
+        results = list(pool.map(
+            lambda batch: segment_trend_stats(prices, timestamps_days, batch[0], batch[1]), batches
+        ))
+
+    return np.vstack(results)
@@ -0,0 +1,35 @@
+"""Compile and cache the Numba kernels ahead of time (run at image build)"""
+import logging
+
+import numpy as np
+
+from ._kernels import NUMBA_AVAILABLE, segment_trend_stats, trend_and_confidence
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Call every kernel once per dtype so its cache files exist before the first run"""
+    if not NUMBA_AVAILABLE:
+        logger.warning("Numba is not installed; nothing to precompile")
+        return
+
+    days = np.arange(4, dtype=np.float64)
+    starts = np.array([0, 2], dtype=np.int64)
+    ends = np.array([2, 4], dtype=np.int64)
+
+    # Dispatch specializes on dtype and writability, and prices from pandas come
+    # back as read-only views, so warm every combination the analyzer can pass
+    for dtype in (np.float32, np.float64):
+        for writeable in (True, False):
+            prices = np.array([100.0, 101.0, 99.5, 102.0], dtype=dtype)
+            prices.flags.writeable = writeable
+            trend_and_confidence(prices, days)
+            segment_trend_stats(prices, days, starts, ends)
+
+    logger.info("Numba kernels compiled and cached")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,21 +1,62 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import Dict, Optional
 from datetime import datetime, timedelta
+from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
 from ..database import ExchangeRate
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
 logger = logging.getLogger(__name__)
 
+# Shared pool used to query the rate APIs concurrently
+_api_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='fx-api')
+
+
+def _create_http_session() -> requests.Session:
+    """Create the keep-alive session used for all rate API calls"""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip'
+    return session
+
+
+# Converters are short-lived, so connections are pooled at module level
+_http = _create_http_session()
+
+
+def _json(response: requests.Response):
+    """Decode a response body without requests' encoding detection"""
+    return json_loads(response.content)
+
 
 class CurrencyConverter:
     """Handles currency conversion for price normalization"""
     
+    # (from, to) -> (rate, monotonic expiry), shared by every instance in the process
+    _rate_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    _rate_cache_lock = threading.Lock()
+    _rate_cache_maxsize = 128
+    
     def __init__(self, db_session: Session, api_key: Optional[str] = None):
         self.db_session = db_session
         self.api_key = api_key
         self.base_currency = 'USD'
         self.cache_duration_hours = 24
+        self._cutoff_cache = (None, 0.0)
         
         # Fallback exchange rates (updated periodically)
         self.fallback_rates = {
@@ -39,19 +80,32 @@ class CurrencyConverter:
         
         return None
     
+    def load_rates_as_dict(self, currencies) -> Dict[str, Optional[float]]:
+        """Resolve the USD rate for each currency once, for use across a batch"""
+        return {
+            currency: 1.0 if currency == 'USD' else self.get_exchange_rate(currency, 'USD')
+            for currency in set(currencies)
+        }
+    
     def get_exchange_rate(self, from_currency: str, to_currency: str = 'USD') -> Optional[float]:
         """Get exchange rate, using cache first, then API, then fallback"""
         
-        # Check cache first
+        # Check in-process cache, then the database cache
+        memory_rate = self._get_memory_rate(from_currency, to_currency)
+        if memory_rate:
+            return memory_rate
+        
         cached_rate = self._get_cached_rate(from_currency, to_currency)
         if cached_rate:
             logger.debug(f"Using cached rate {from_currency}/{to_currency}: {cached_rate}")
+            self._set_memory_rate(from_currency, to_currency, cached_rate)
             return cached_rate
         
         # Try to fetch from API
         api_rate = self._fetch_rate_from_api(from_currency, to_currency)
         if api_rate:
             self._cache_rate(from_currency, to_currency, api_rate)
+            self._set_memory_rate(from_currency, to_currency, api_rate)
             logger.info(f"Fetched API rate {from_currency}/{to_currency}: {api_rate}")
             return api_rate
         
@@ -64,9 +118,49 @@ class CurrencyConverter:
         logger.error(f"Could not get exchange rate for {from_currency}/{to_currency}")
         return None
     
+    def _get_memory_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Get exchange rate from the in-process cache if it hasn't expired"""
+        key = (from_currency, to_currency)
+        
+        with self._rate_cache_lock:
+            entry = self._rate_cache.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._rate_cache.move_to_end(key)
+                return entry[0]
+        
+        return None
+    
+    def _set_memory_rate(self, from_currency: str, to_currency: str, rate: float):
+        """Store exchange rate in the in-process cache"""
+        key = (from_currency, to_currency)
+        expires_at = time.monotonic() + self.cache_duration_hours * 3600
+        
+        with self._rate_cache_lock:
+            self._rate_cache[key] = (rate, expires_at)
+            self._rate_cache.move_to_end(key)
+            while len(self._rate_cache) > self._rate_cache_maxsize:
+                self._rate_cache.popitem(last=False)
+    
+    @classmethod
+    def clear_rate_cache(cls):
+        """Drop every in-process cached rate"""
+        with cls._rate_cache_lock:
+            cls._rate_cache.clear()
+    
+    def _current_cutoff(self) -> datetime:
+        """Get the oldest acceptable cached-rate date, recomputed at most once a minute"""
+        cutoff_time, computed_at = self._cutoff_cache
+        now = time.monotonic()
+        
+        if cutoff_time is None or now - computed_at >= 60:
+            cutoff_time = datetime.utcnow() - timedelta(hours=self.cache_duration_hours)
+            self._cutoff_cache = (cutoff_time, now)
+        
+        return cutoff_time
+    
     def _get_cached_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
         """Get exchange rate from database cache"""
-        cutoff_time = datetime.utcnow() - timedelta(hours=self.cache_duration_hours)
+        cutoff_time = self._current_cutoff()
         
         cached_rate = self.db_session.query(ExchangeRate).filter(
             ExchangeRate.from_currency == from_currency,
@@ -97,21 +191,29 @@ class CurrencyConverter:
     def _fetch_rate_from_api(self, from_currency: str, to_currency: str) -> Optional[float]:
         """Fetch exchange rate from external API"""
         
-        # Try multiple free APIs
+        # Query multiple free APIs at once and take the first usable answer
         apis = [
             self._fetch_from_exchangerate_api,
             self._fetch_from_fixer_io,
             self._fetch_from_free_forex_api
         ]
         
-        for api_func in apis:
-            try:
-                rate = api_func(from_currency, to_currency)
+        pending = {_api_executor.submit(api_func, from_currency, to_currency) for api_func in apis}
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                try:
+                    rate = future.result()
+                except Exception as e:
+                    logger.debug(f"API call failed: {e}")
+                    continue
+                
                 if rate:
+                    for other in pending:
+                        other.cancel()
                     return rate
-            except Exception as e:
-                logger.debug(f"API call failed: {e}")
-                continue
         
         return None
     
@@ -119,10 +221,10 @@ class CurrencyConverter:
         """Fetch from exchangerate-api.com (free tier available)"""
         try:
             url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
-            response = requests.get(url, timeout=10)
+            response = _http.get(url, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json(response)
             rates = data.get('rates', {})
             
             return rates.get(to_currency)
@@ -144,10 +246,10 @@ class CurrencyConverter:
                 'symbols': to_currency
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = _http.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json(response)
             if data.get('success'):
                 rates = data.get('rates', {})
                 return rates.get(to_currency)
@@ -166,12 +268,14 @@ class CurrencyConverter:
                 'amount': 1
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = _http.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
-            if data.get('success'):
-                return data.get('result')
+            # The endpoint may omit the 'success' flag; a result is enough
+            data = _json(response)
+            result = data.get('result')
+            if result is not None:
+                return float(result)
             
         except Exception as e:
             logger.debug(f"ExchangeRate.host error: {e}")
@@ -182,37 +286,40 @@ class CurrencyConverter:
         if from_currency == to_currency:
             return 1.0
         
-        # Convert via USD if needed
-        if to_currency != 'USD':
-            from_rate = self.fallback_rates.get(from_currency)
-            to_rate = self.fallback_rates.get(to_currency)
-            
-            if from_rate and to_rate:
-                # Convert from_currency -> USD -> to_currency
-                return to_rate / from_rate
-        else:
-            # Direct conversion to USD
-            from_rate = self.fallback_rates.get(from_currency)
-            if from_rate:
-                return 1.0 / from_rate
+        from_rate = self.fallback_rates.get(from_currency)
+        to_rate = self.fallback_rates.get(to_currency)
+        
+        if from_rate and to_rate:
+            # Convert from_currency -> USD -> to_currency (USD itself is 1.0)
+            return to_rate / from_rate
         
         return None
     
     def update_fallback_rates(self):
         """Update fallback rates from latest successful API calls"""
         try:
-            # Get latest rates from database for each currency
+            # Get latest rate per currency from the database in one query
             currencies = ['EUR', 'GBP', 'JPY', 'INR', 'CAD', 'AUD']
             
-            for currency in currencies:
-                latest_rate = self.db_session.query(ExchangeRate).filter(
-                    ExchangeRate.from_currency == currency,
-                    ExchangeRate.to_currency == 'USD'
-                ).order_by(ExchangeRate.date.desc()).first()
-                
-                if latest_rate:
-                    self.fallback_rates[currency] = latest_rate.rate
-                    logger.info(f"Updated fallback rate for {currency}: {latest_rate.rate}")
+            latest = self.db_session.query(
+                ExchangeRate.from_currency,
+                func.max(ExchangeRate.date).label('max_date')
+            ).filter(
+                ExchangeRate.to_currency == 'USD',
+                ExchangeRate.from_currency.in_(currencies)
+            ).group_by(ExchangeRate.from_currency).subquery()
+            
+            latest_rates = self.db_session.query(ExchangeRate).join(
+                latest,
+                and_(
+                    ExchangeRate.from_currency == latest.c.from_currency,
+                    ExchangeRate.date == latest.c.max_date
+                )
+            ).filter(ExchangeRate.to_currency == 'USD').all()
+            
+            for latest_rate in latest_rates:
+                self.fallback_rates[latest_rate.from_currency] = latest_rate.rate
+                logger.info(f"Updated fallback rate for {latest_rate.from_currency}: {latest_rate.rate}")
         
         except Exception as e:
             logger.error(f"Error updating fallback rates: {e}")
@@ -222,27 +329,24 @@ class CurrencyConverter:
         return list(self.fallback_rates.keys())
     
     def bulk_convert_to_usd(self, amounts_and_currencies: list) -> list:
-        """Convert multiple amounts to USD efficiently"""
-        results = []
+        """Convert multiple (amount, currency, index) items to USD; index is the output position"""
+        results = [None] * len(amounts_and_currencies)
         
         # Group by currency to minimize API calls
-        currency_groups = {}
+        currency_groups = defaultdict(list)
         for amount, currency, index in amounts_and_currencies:
-            if currency not in currency_groups:
-                currency_groups[currency] = []
             currency_groups[currency].append((amount, index))
         
-        # Convert each currency group
+        # Convert each currency group straight into its output slots
         for currency, items in currency_groups.items():
-            rate = self.get_exchange_rate(currency, 'USD') if currency != 'USD' else 1.0
+            if currency == 'USD':
+                for amount, index in items:
+                    results[index] = amount
+                continue
             
-            for amount, index in items:
-                if rate:
-                    usd_amount = amount / rate if currency != 'USD' else amount
-                    results.append((index, usd_amount))
-                else:
-                    results.append((index, None))
-        
-        # Sort by original index
-        results.sort(key=lambda x: x[0])
-        return [result[1] for result in results]
\ No newline at end of file
+            rate = self.get_exchange_rate(currency, 'USD')
+            if rate:
+                for amount, index in items:
+                    results[index] = amount / rate
+        
+        return results
\ No newline at end of file
@@ -2,14 +2,49 @@ from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, func, desc, text, bindparam, DateTime
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from ..database import PriceRecord, PhoneModel, Platform, PriceTrend
+from ._kernels import NUMBA_AVAILABLE, parallel_segment_trend_stats
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round-trip when streaming price history out of the database
+TREND_FETCH_BATCH = 10_000
+
+# Market summary aggregates over one shared scan of the last week's records
+MARKET_SUMMARY_SQL = text("""
+    WITH recent AS (
+        SELECT phone_model_id, platform_id, price_usd
+        FROM price_records
+        WHERE scrape_timestamp >= :since
+    )
+    SELECT 'total' AS kind, NULL AS label, NULL AS detail, COUNT(*) AS record_count, NULL AS avg_price
+    FROM price_records
+    UNION ALL
+    SELECT 'recent', NULL, NULL, COUNT(*), NULL
+    FROM recent
+    UNION ALL
+    SELECT 'brand', pm.brand, NULL, NULL, AVG(r.price_usd)
+    FROM recent r JOIN phone_models pm ON pm.id = r.phone_model_id
+    WHERE r.price_usd IS NOT NULL
+    GROUP BY pm.brand
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'model', pm.brand, pm.model_name, COUNT(*) AS record_count, NULL
+        FROM recent r JOIN phone_models pm ON pm.id = r.phone_model_id
+        GROUP BY pm.brand, pm.model_name
+        ORDER BY record_count DESC
+        LIMIT 5
+    ) AS top_models
+    UNION ALL
+    SELECT 'platform', p.name, NULL, COUNT(*), NULL
+    FROM recent r JOIN platforms p ON p.id = r.platform_id
+    GROUP BY p.name
+""").bindparams(bindparam('since', type_=DateTime))
+
 
 @dataclass
 class PriceAnalysis:
@@ -35,6 +70,9 @@ class PriceAnalysis:
     confidence_score: float
 
 
+PRICE_ANALYSIS_FIELDS = tuple(f.name for f in fields(PriceAnalysis))
+
+
 @dataclass
 class MarketInsight:
     insight_type: str  # 'price_drop', 'arbitrage', 'trend_change', 'best_deal'
@@ -53,156 +91,183 @@ class PriceAnalyzer:
     def __init__(self, db_session: Session):
         self.db_session = db_session
         self.price_change_threshold = 5.0  # 5% threshold for significant changes
+        
+        # Phone models and platforms are small, rarely-changing tables; load each once per analyzer
+        self._phone_model_cache: Optional[Dict[int, PhoneModel]] = None
+        self._platform_cache: Optional[Dict[int, Platform]] = None
+    
+    def _phone_models(self) -> Dict[int, PhoneModel]:
+        """All phone models by id, loaded on first use"""
+        if self._phone_model_cache is None:
+            self._phone_model_cache = {m.id: m for m in self.db_session.query(PhoneModel).all()}
+        return self._phone_model_cache
+    
+    def _platforms(self) -> Dict[int, Platform]:
+        """All platforms by id, loaded on first use"""
+        if self._platform_cache is None:
+            self._platform_cache = {p.id: p for p in self.db_session.query(Platform).all()}
+        return self._platform_cache
+    
+    def _phone_model(self, phone_model_id: int) -> Optional[PhoneModel]:
+        """Look up a phone model by id from the analyzer's cache"""
+        return self._phone_models().get(phone_model_id)
+    
+    def _platform(self, platform_id: int) -> Optional[Platform]:
+        """Look up a platform by id from the analyzer's cache"""
+        return self._platforms().get(platform_id)
     
     def analyze_price_trends(self, days_back: int = 30) -> List[PriceAnalysis]:
         """Analyze price trends for all phone models and platforms"""
-        analyses = []
+        frame = self.analyze_price_trends_frame(days_back)
+        return [PriceAnalysis(**row) for row in frame.to_dict('records')]
+    
+    def analyze_price_trends_frame(self, days_back: int = 30) -> pd.DataFrame:
+        """Analyze price trends as a DataFrame with one row per combination and PriceAnalysis columns"""
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=days_back)
         
-        # Get all unique phone model/platform/condition combinations
-        combinations = self.db_session.query(
+        # Load every price point in the window into one frame instead of per combination.
+        # The database also tags each row with its predecessor's price and its recency
+        # rank, so each combination's latest row already carries current/previous prices
+        partition = [PriceRecord.phone_model_id, PriceRecord.platform_id, PriceRecord.condition]
+        prices_query = self.db_session.query(
             PriceRecord.phone_model_id,
             PriceRecord.platform_id,
-            PriceRecord.condition
-        ).distinct().all()
-        
-        for phone_model_id, platform_id, condition in combinations:
-            try:
-                analysis = self._analyze_single_combination(
-                    phone_model_id, platform_id, condition, days_back
-                )
-                if analysis:
-                    analyses.append(analysis)
-            except Exception as e:
-                logger.error(f"Error analyzing combination {phone_model_id}/{platform_id}/{condition}: {e}")
-        
-        return analyses
-    
-    def _analyze_single_combination(self, phone_model_id: int, platform_id: int, 
-                                  condition: str, days_back: int) -> Optional[PriceAnalysis]:
-        """Analyze price trends for a single phone/platform/condition combination"""
-        
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-        
-        # Get price records for this combination
-        prices_query = self.db_session.query(PriceRecord).filter(
+            PriceRecord.condition,
+            PriceRecord.scrape_timestamp.label('timestamp'),
+            PriceRecord.price_usd,
+            func.lag(PriceRecord.price_usd).over(
+                partition_by=partition, order_by=PriceRecord.scrape_timestamp
+            ).label('previous_price'),
+            func.row_number().over(
+                partition_by=partition, order_by=PriceRecord.scrape_timestamp.desc()
+            ).label('recency_rank')
+        ).filter(
             and_(
-                PriceRecord.phone_model_id == phone_model_id,
-                PriceRecord.platform_id == platform_id,
-                PriceRecord.condition == condition,
                 PriceRecord.scrape_timestamp >= cutoff_date,
                 PriceRecord.price_usd.isnot(None)
             )
-        ).order_by(desc(PriceRecord.scrape_timestamp))
-        
-        prices = prices_query.all()
-        
-        if len(prices) < 2:
-            return None
-        
-        # Get phone model and platform details
-        phone_model = self.db_session.query(PhoneModel).get(phone_model_id)
-        platform = self.db_session.query(Platform).get(platform_id)
-        
-        if not phone_model or not platform:
-            return None
+        ).order_by(
+            # Combination-then-time order makes each group one contiguous, time-ordered run
+            PriceRecord.phone_model_id,
+            PriceRecord.platform_id,
+            PriceRecord.condition,
+            PriceRecord.scrape_timestamp
+        )
         
-        # Convert to pandas for analysis
-        df = pd.DataFrame([{
-            'timestamp': p.scrape_timestamp,
-            'price_usd': p.price_usd,
-            'price': p.price,
-            'currency': p.currency
-        } for p in prices])
+        # Stream plain row tuples (server-side cursor where supported) and turn each
+        # batch into columns straight away, so no full result list is ever held
+        result = self.db_session.execute(prices_query.statement, execution_options={'yield_per': TREND_FETCH_BATCH})
+        columns = list(result.keys())
+        frames = [pd.DataFrame.from_records(rows, columns=columns) for rows in result.partitions()]
+        if not frames:
+            return pd.DataFrame(columns=PRICE_ANALYSIS_FIELDS)
         
+        df = pd.concat(frames, ignore_index=True)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
-        
-        # Calculate metrics
-        current_price = df['price_usd'].iloc[-1]
-        previous_price = df['price_usd'].iloc[-2] if len(df) > 1 else None
-        
-        price_change_amount = current_price - previous_price if previous_price else 0
-        price_change_percent = (price_change_amount / previous_price * 100) if previous_price else 0
-        
-        # Calculate averages and volatility
-        df_7d = df[df['timestamp'] >= (datetime.utcnow() - timedelta(days=7))]
-        df_30d = df[df['timestamp'] >= (datetime.utcnow() - timedelta(days=30))]
-        
-        avg_price_7d = df_7d['price_usd'].mean() if len(df_7d) > 0 else current_price
-        avg_price_30d = df_30d['price_usd'].mean() if len(df_30d) > 0 else current_price
-        min_price_7d = df_7d['price_usd'].min() if len(df_7d) > 0 else current_price
-        max_price_7d = df_7d['price_usd'].max() if len(df_7d) > 0 else current_price
-        
-        volatility = df['price_usd'].std() if len(df) > 1 else 0.0
-        
-        # Determine trend direction
-        trend_direction = self._determine_trend_direction(df)
-        confidence_score = self._calculate_confidence_score(df, volatility)
-        
-        return PriceAnalysis(
-            phone_model=phone_model.model_name,
-            brand=phone_model.brand,
-            storage=phone_model.storage_capacity,
-            platform=platform.name,
-            region=platform.region,
-            condition=condition,
-            current_price=current_price,
-            previous_price=previous_price,
-            price_change_amount=price_change_amount,
-            price_change_percent=price_change_percent,
-            avg_price_7d=avg_price_7d,
-            avg_price_30d=avg_price_30d,
-            min_price_7d=min_price_7d,
-            max_price_7d=max_price_7d,
-            volatility=volatility,
-            trend_direction=trend_direction,
-            confidence_score=confidence_score
-        )
+        # Reported prices stay float64 so they keep exact cents; a float32 copy feeds the
+        # bulk mean/volatility aggregations, halving the bytes they stream
+        df['price_usd'] = df['price_usd'].astype(np.float64)
+        df['previous_price'] = df['previous_price'].astype(np.float64)
+        df['price_f32'] = df['price_usd'].astype(np.float32)
+        
+        metrics = self._compute_trend_metrics(df, now)
+        
+        # Attach names column-wise; combinations whose model/platform is gone are dropped
+        phone_models = self._phone_models()
+        platforms = self._platforms()
+        model_ids = metrics['phone_model_id']
+        platform_ids = metrics['platform_id']
+        metrics['phone_model'] = model_ids.map({i: m.model_name for i, m in phone_models.items()})
+        metrics['brand'] = model_ids.map({i: m.brand for i, m in phone_models.items()})
+        metrics['storage'] = model_ids.map({i: m.storage_capacity for i, m in phone_models.items()})
+        metrics['platform'] = platform_ids.map({i: p.name for i, p in platforms.items()})
+        metrics['region'] = platform_ids.map({i: p.region for i, p in platforms.items()})
+        
+        known = model_ids.isin(phone_models.keys()) & platform_ids.isin(platforms.keys())
+        return metrics.loc[known, list(PRICE_ANALYSIS_FIELDS)].reset_index(drop=True)
     
-    def _determine_trend_direction(self, df: pd.DataFrame) -> str:
-        """Determine overall trend direction from price data"""
-        if len(df) < 3:
-            return 'stable'
-        
-        # Calculate trend using linear regression slope
-        x = np.arange(len(df))
-        y = df['price_usd'].values
+    def _compute_trend_metrics(self, df: pd.DataFrame, now: datetime) -> pd.DataFrame:
+        """Compute per phone/platform/condition trend metrics in whole-frame groupby passes"""
+        keys = ['phone_model_id', 'platform_id', 'condition']
+        cutoff_7d = now - timedelta(days=7)
+        cutoff_30d = now - timedelta(days=30)
+        
+        grouped = df.groupby(keys, sort=False)
+        prices = grouped['price_f32']
+        
+        metrics = prices.agg(count='count', avg_price='mean')
+        latest = df[df['recency_rank'] == 1].set_index(keys)
+        metrics['current_price'] = latest['price_usd']
+        metrics['previous_price'] = latest['previous_price']
+        
+        if NUMBA_AVAILABLE:
+            metrics = metrics.join(self._kernel_trend_stats(df, keys))
+        else:
+            metrics['volatility'] = prices.std()
+            metrics['days_span'] = (grouped['timestamp'].max() - grouped['timestamp'].min()).dt.days
+            # Least-squares slope against the sample index: x - mean(x) comes from cumcount,
+            # and sum((x - mean(x))^2) over 0..n-1 is n(n^2 - 1)/12
+            x_dev = grouped.cumcount() - (prices.transform('size') - 1) / 2
+            y_dev = df['price_f32'] - prices.transform('mean')
+            sxy = (x_dev * y_dev).groupby([df[k] for k in keys], sort=False).sum()
+            count = metrics['count']
+            metrics['slope'] = sxy / (count * (count * count - 1) / 12)
+        
+        recent_7d = df[df['timestamp'] >= cutoff_7d].groupby(keys, sort=False)
+        window_7d = recent_7d['price_f32'].agg(avg_price_7d='mean').join(
+            recent_7d['price_usd'].agg(min_price_7d='min', max_price_7d='max')
+        )
+        window_30d = df[df['timestamp'] >= cutoff_30d].groupby(keys, sort=False)['price_f32'].agg(
+            avg_price_30d='mean'
+        )
+        metrics = metrics.join(window_7d).join(window_30d)
+        # Derived percentages are computed in float64
+        metrics = metrics.astype({c: np.float64 for c in metrics.select_dtypes(np.float32).columns})
+        metrics = metrics[metrics['count'] >= 2]
+        
+        for column in ('avg_price_7d', 'avg_price_30d', 'min_price_7d', 'max_price_7d'):
+            metrics[column] = metrics[column].fillna(metrics['current_price'])
+        
+        # No usable previous price (missing or zero) means no change, as before vectorizing
+        has_previous = metrics['previous_price'] > 0
+        change_amount = metrics['current_price'] - metrics['previous_price']
+        metrics['price_change_amount'] = np.where(has_previous, change_amount, 0.0)
+        metrics['price_change_percent'] = np.where(
+            has_previous, change_amount / metrics['previous_price'].where(has_previous) * 100, 0.0
+        )
         
-        slope, _ = np.polyfit(x, y, 1)
+        count = metrics['count']
+        normalized_slope = metrics['slope'] / metrics['avg_price'] * 100
+        metrics['trend_direction'] = np.where(
+            count < 3, 'stable',
+            np.where(normalized_slope > 0.5, 'up', np.where(normalized_slope < -0.5, 'down', 'stable'))
+        )
         
-        # Normalize slope by average price
-        avg_price = y.mean()
-        normalized_slope = (slope / avg_price) * 100  # Convert to percentage per day
+        data_score = np.minimum(count / 20.0, 1.0)
+        volatility_ratio = (metrics['volatility'] / metrics['avg_price']).where(metrics['avg_price'] > 0, 1.0)
+        volatility_score = np.maximum(0, 1.0 - volatility_ratio * 2)
+        recency_score = np.minimum(metrics['days_span'] / 30.0, 1.0)
+        confidence = (data_score * 0.4 + volatility_score * 0.4 + recency_score * 0.2).clip(0.1, 1.0)
+        metrics['confidence_score'] = confidence.where(count >= 3, 0.3)
         
-        if normalized_slope > 0.5:  # More than 0.5% increase per day on average
-            return 'up'
-        elif normalized_slope < -0.5:  # More than 0.5% decrease per day on average
-            return 'down'
-        else:
-            return 'stable'
+        return metrics.reset_index()
     
-    def _calculate_confidence_score(self, df: pd.DataFrame, volatility: float) -> float:
-        """Calculate confidence score for the trend analysis"""
-        if len(df) < 3:
-            return 0.3
-        
-        # More data points = higher confidence
-        data_score = min(len(df) / 20.0, 1.0)  # Max confidence at 20+ data points
-        
-        # Lower volatility = higher confidence  
-        avg_price = df['price_usd'].mean()
-        volatility_ratio = volatility / avg_price if avg_price > 0 else 1.0
-        volatility_score = max(0, 1.0 - volatility_ratio * 2)  # Penalize high volatility
-        
-        # Recency score - more recent data is better
-        days_span = (df['timestamp'].max() - df['timestamp'].min()).days
-        recency_score = min(days_span / 30.0, 1.0)  # Max confidence with 30+ days of data
-        
-        # Combine scores
-        confidence = (data_score * 0.4 + volatility_score * 0.4 + recency_score * 0.2)
-        return max(0.1, min(1.0, confidence))
+    def _kernel_trend_stats(self, df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        """Slope, volatility and day span per combination from the compiled kernel"""
+        # The query already returns each combination as one contiguous, time-ordered run
+        codes = df.groupby(keys, sort=False).ngroup().to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        
+        days = df['timestamp'].to_numpy('datetime64[ns]').astype(np.int64) / 86_400e9
+        stats = parallel_segment_trend_stats(df['price_f32'].to_numpy(), days, starts, ends)
+        
+        index = pd.MultiIndex.from_frame(df[keys].iloc[starts])
+        return pd.DataFrame(stats[:, [0, 2, 5]], index=index, columns=['slope', 'volatility', 'days_span'])
     
-    def find_arbitrage_opportunities(self, min_profit_percent: float = 10.0) -> List[MarketInsight]:
+    def find_arbitrage_opportunities(self, min_profit_percent: float = 10.0,
+                                     limit: Optional[int] = None) -> List[MarketInsight]:
         """Find arbitrage opportunities between regions/platforms"""
         insights = []
         
@@ -218,7 +283,18 @@ class PriceAnalyzer:
             PriceRecord.condition
         ).subquery()
         
-        latest_prices = self.db_session.query(PriceRecord).join(
+        # Rank each model/condition's latest prices from both ends so only the
+        # cheapest and dearest rows leave the database
+        partition = [PriceRecord.phone_model_id, PriceRecord.condition]
+        ranked = self.db_session.query(
+            PriceRecord.phone_model_id,
+            PriceRecord.platform_id,
+            PriceRecord.condition,
+            PriceRecord.price_usd,
+            func.row_number().over(partition_by=partition, order_by=PriceRecord.price_usd).label('rn_lo'),
+            func.row_number().over(partition_by=partition, order_by=PriceRecord.price_usd.desc()).label('rn_hi'),
+            func.count().over(partition_by=partition).label('price_count')
+        ).join(
             latest_prices_subquery,
             and_(
                 PriceRecord.phone_model_id == latest_prices_subquery.c.phone_model_id,
@@ -226,89 +302,106 @@ class PriceAnalyzer:
                 PriceRecord.condition == latest_prices_subquery.c.condition,
                 PriceRecord.scrape_timestamp == latest_prices_subquery.c.latest_timestamp
             )
-        ).all()
-        
-        # Group by phone model and condition
-        price_groups = {}
-        for price in latest_prices:
-            key = (price.phone_model_id, price.condition)
-            if key not in price_groups:
-                price_groups[key] = []
-            price_groups[key].append(price)
-        
-        # Find arbitrage opportunities within each group
-        for (phone_model_id, condition), prices in price_groups.items():
-            if len(prices) < 2:
-                continue
-            
-            phone_model = self.db_session.query(PhoneModel).get(phone_model_id)
-            if not phone_model:
-                continue
-            
-            # Sort by price (lowest first)
-            prices_sorted = sorted(prices, key=lambda p: p.price_usd or float('inf'))
-            
-            min_price = prices_sorted[0]
-            max_price = prices_sorted[-1]
-            
-            if not min_price.price_usd or not max_price.price_usd:
-                continue
-            
-            profit_percent = ((max_price.price_usd - min_price.price_usd) / min_price.price_usd) * 100
-            
-            if profit_percent >= min_profit_percent:
-                min_platform = self.db_session.query(Platform).get(min_price.platform_id)
-                max_platform = self.db_session.query(Platform).get(max_price.platform_id)
-                
-                insights.append(MarketInsight(
-                    insight_type='arbitrage',
-                    title=f'Arbitrage Opportunity: {phone_model.brand} {phone_model.model_name}',
-                    description=f'Buy from {min_platform.name} (${min_price.price_usd:.2f}) '
-                              f'and sell on {max_platform.name} (${max_price.price_usd:.2f}) '
-                              f'for {profit_percent:.1f}% profit',
-                    phone_model=f'{phone_model.brand} {phone_model.model_name}',
-                    platform=f'{min_platform.name} → {max_platform.name}',
-                    region=f'{min_platform.region} → {max_platform.region}',
-                    value=profit_percent,
-                    confidence=0.8
-                ))
+        ).filter(PriceRecord.price_usd > 0).subquery()
+        
+        low = aliased(ranked)
+        high = aliased(ranked)
+        low_platform = aliased(Platform)
+        high_platform = aliased(Platform)
+        profit_percent = ((high.c.price_usd - low.c.price_usd) / low.c.price_usd * 100).label('profit_percent')
+        
+        opportunities = self.db_session.query(
+            PhoneModel.brand,
+            PhoneModel.model_name,
+            low_platform.name.label('min_platform'),
+            low_platform.region.label('min_region'),
+            low.c.price_usd.label('min_price'),
+            high_platform.name.label('max_platform'),
+            high_platform.region.label('max_region'),
+            high.c.price_usd.label('max_price'),
+            profit_percent
+        ).select_from(low).join(
+            high,
+            and_(
+                high.c.phone_model_id == low.c.phone_model_id,
+                high.c.condition == low.c.condition,
+                high.c.rn_hi == 1
+            )
+        ).join(
+            PhoneModel, PhoneModel.id == low.c.phone_model_id
+        ).join(
+            low_platform, low_platform.id == low.c.platform_id
+        ).join(
+            high_platform, high_platform.id == high.c.platform_id
+        ).filter(
+            and_(
+                low.c.rn_lo == 1,
+                low.c.price_count >= 2,
+                profit_percent >= min_profit_percent
+            )
+        ).order_by(desc('profit_percent'))
+        
+        if limit:
+            opportunities = opportunities.limit(limit)
+        
+        for row in opportunities.all():
+            insights.append(MarketInsight(
+                insight_type='arbitrage',
+                title=f'Arbitrage Opportunity: {row.brand} {row.model_name}',
+                description=f'Buy from {row.min_platform} (${row.min_price:.2f}) '
+                          f'and sell on {row.max_platform} (${row.max_price:.2f}) '
+                          f'for {row.profit_percent:.1f}% profit',
+                phone_model=f'{row.brand} {row.model_name}',
+                platform=f'{row.min_platform} → {row.max_platform}',
+                region=f'{row.min_region} → {row.max_region}',
+                value=row.profit_percent,
+                confidence=0.8
+            ))
         
-        return sorted(insights, key=lambda x: x.value, reverse=True)
+        return insights
     
-    def find_significant_price_changes(self, min_change_percent: float = 10.0) -> List[MarketInsight]:
+    def find_significant_price_changes(self, min_change_percent: float = 10.0,
+                                       limit: Optional[int] = None) -> List[MarketInsight]:
         """Find significant price changes in the last week"""
         insights = []
         
         one_week_ago = datetime.utcnow() - timedelta(days=7)
-        two_weeks_ago = datetime.utcnow() - timedelta(days=14)
         
-        # Get recent price trends
-        recent_trends = self.db_session.query(PriceTrend).filter(
+        # Get recent price trends together with their model/platform names
+        trends_query = self.db_session.query(
+            PriceTrend.price_change_percent,
+            PriceTrend.current_price_usd,
+            PhoneModel.brand,
+            PhoneModel.model_name,
+            Platform.name.label('platform_name'),
+            Platform.region
+        ).join(
+            PhoneModel, PriceTrend.phone_model_id == PhoneModel.id
+        ).join(
+            Platform, PriceTrend.platform_id == Platform.id
+        ).filter(
             and_(
                 PriceTrend.trend_date >= one_week_ago,
                 PriceTrend.trend_period == 'weekly',
                 func.abs(PriceTrend.price_change_percent) >= min_change_percent
             )
-        ).order_by(desc(func.abs(PriceTrend.price_change_percent))).all()
+        ).order_by(desc(func.abs(PriceTrend.price_change_percent)))
         
-        for trend in recent_trends:
-            phone_model = self.db_session.query(PhoneModel).get(trend.phone_model_id)
-            platform = self.db_session.query(Platform).get(trend.platform_id)
-            
-            if not phone_model or not platform:
-                continue
-            
+        if limit:
+            trends_query = trends_query.limit(limit)
+        
+        for trend in trends_query.all():
             change_type = 'price_drop' if trend.price_change_percent < 0 else 'price_increase'
             change_direction = 'dropped' if trend.price_change_percent < 0 else 'increased'
             
             insights.append(MarketInsight(
                 insight_type=change_type,
-                title=f'Significant Price Change: {phone_model.brand} {phone_model.model_name}',
+                title=f'Significant Price Change: {trend.brand} {trend.model_name}',
                 description=f'Price {change_direction} by {abs(trend.price_change_percent):.1f}% '
-                          f'on {platform.name} to ${trend.current_price_usd:.2f}',
-                phone_model=f'{phone_model.brand} {phone_model.model_name}',
-                platform=platform.name,
-                region=platform.region,
+                          f'on {trend.platform_name} to ${trend.current_price_usd:.2f}',
+                phone_model=f'{trend.brand} {trend.model_name}',
+                platform=trend.platform_name,
+                region=trend.region,
                 value=abs(trend.price_change_percent),
                 confidence=0.9
             ))
@@ -318,6 +411,9 @@ class PriceAnalyzer:
     def find_best_deals(self, top_n: int = 10) -> List[MarketInsight]:
         """Find the best deals across all platforms"""
         insights = []
+        now = datetime.utcnow()
+        cutoff_3d = now - timedelta(days=3)
+        cutoff_30d = now - timedelta(days=30)
         
         # For each phone model/condition, find the lowest current price
         latest_prices_subquery = self.db_session.query(
@@ -326,7 +422,7 @@ class PriceAnalyzer:
             func.min(PriceRecord.price_usd).label('min_price')
         ).filter(
             and_(
-                PriceRecord.scrape_timestamp >= datetime.utcnow() - timedelta(days=3),
+                PriceRecord.scrape_timestamp >= cutoff_3d,
                 PriceRecord.price_usd.isnot(None),
                 PriceRecord.availability == True
             )
@@ -335,7 +431,12 @@ class PriceAnalyzer:
             PriceRecord.condition
         ).subquery()
         
-        best_deals = self.db_session.query(PriceRecord).join(
+        best_deals = self.db_session.query(
+            PriceRecord.phone_model_id,
+            PriceRecord.platform_id,
+            PriceRecord.condition,
+            PriceRecord.price_usd
+        ).join(
             latest_prices_subquery,
             and_(
                 PriceRecord.phone_model_id == latest_prices_subquery.c.phone_model_id,
@@ -345,8 +446,8 @@ class PriceAnalyzer:
         ).order_by(PriceRecord.price_usd).limit(top_n).all()
         
         for deal in best_deals:
-            phone_model = self.db_session.query(PhoneModel).get(deal.phone_model_id)
-            platform = self.db_session.query(Platform).get(deal.platform_id)
+            phone_model = self._phone_model(deal.phone_model_id)
+            platform = self._platform(deal.platform_id)
             
             if not phone_model or not platform:
                 continue
@@ -356,7 +457,7 @@ class PriceAnalyzer:
                 and_(
                     PriceRecord.phone_model_id == deal.phone_model_id,
                     PriceRecord.condition == deal.condition,
-                    PriceRecord.scrape_timestamp >= datetime.utcnow() - timedelta(days=30),
+                    PriceRecord.scrape_timestamp >= cutoff_30d,
                     PriceRecord.price_usd.isnot(None)
                 )
             ).scalar()
@@ -383,47 +484,31 @@ class PriceAnalyzer:
         now = datetime.utcnow()
         one_week_ago = now - timedelta(days=7)
         
-        # Total number of records
-        total_records = self.db_session.query(PriceRecord).count()
-        recent_records = self.db_session.query(PriceRecord).filter(
-            PriceRecord.scrape_timestamp >= one_week_ago
-        ).count()
-        
-        # Average prices by brand
-        brand_avg_prices = self.db_session.query(
-            PhoneModel.brand,
-            func.avg(PriceRecord.price_usd).label('avg_price')
-        ).join(PhoneModel, PriceRecord.phone_model_id == PhoneModel.id).filter(
-            and_(
-                PriceRecord.scrape_timestamp >= one_week_ago,
-                PriceRecord.price_usd.isnot(None)
-            )
-        ).group_by(PhoneModel.brand).all()
-        
-        # Most tracked models
-        popular_models = self.db_session.query(
-            PhoneModel.brand,
-            PhoneModel.model_name,
-            func.count(PriceRecord.id).label('record_count')
-        ).join(PhoneModel, PriceRecord.phone_model_id == PhoneModel.id).filter(
-            PriceRecord.scrape_timestamp >= one_week_ago
-        ).group_by(PhoneModel.brand, PhoneModel.model_name).order_by(
-            desc('record_count')
-        ).limit(5).all()
-        
-        # Platform activity
-        platform_activity = self.db_session.query(
-            Platform.name,
-            func.count(PriceRecord.id).label('record_count')
-        ).join(Platform, PriceRecord.platform_id == Platform.id).filter(
-            PriceRecord.scrape_timestamp >= one_week_ago
-        ).group_by(Platform.name).order_by(desc('record_count')).all()
-        
-        return {
-            'total_records': total_records,
-            'recent_records': recent_records,
-            'brand_avg_prices': {brand: float(avg_price) for brand, avg_price in brand_avg_prices},
-            'popular_models': [(brand, model, count) for brand, model, count in popular_models],
-            'platform_activity': [(platform, count) for platform, count in platform_activity],
+        summary = {
+            'total_records': 0,
+            'recent_records': 0,
+            'brand_avg_prices': {},
+            'popular_models': [],
+            'platform_activity': [],
             'last_updated': now.isoformat()
-        }
\ No newline at end of file
+        }
+        
+        # Every aggregate comes back from one statement, tagged by its `kind` column
+        rows = self.db_session.execute(MARKET_SUMMARY_SQL, {'since': one_week_ago}).all()
+        
+        for row in rows:
+            if row.kind == 'total':
+                summary['total_records'] = row.record_count
+            elif row.kind == 'recent':
+                summary['recent_records'] = row.record_count
+            elif row.kind == 'brand':
+                summary['brand_avg_prices'][row.label] = float(row.avg_price)
+            elif row.kind == 'model':
+                summary['popular_models'].append((row.label, row.detail, row.record_count))
+            elif row.kind == 'platform':
+                summary['platform_activity'].append((row.label, row.record_count))
+        
+        summary['popular_models'].sort(key=lambda item: item[2], reverse=True)
+        summary['platform_activity'].sort(key=lambda item: item[1], reverse=True)
+        
+        return summary
\ No newline at end of file
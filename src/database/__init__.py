@@ -5,8 +5,10 @@ from .models import (
     Platform, 
     PriceRecord,
     PriceTrend,
+    DailyPriceRollup,
     ScrapingSession,
-    ExchangeRate
+    ExchangeRate,
+    new_session_id
 )
 
 __all__ = [
@@ -19,6 +21,8 @@ __all__ = [
     "Platform",
     "PriceRecord", 
     "PriceTrend",
+    "DailyPriceRollup",
     "ScrapingSession",
-    "ExchangeRate"
+    "ExchangeRate",
+    "new_session_id"
 ]
\ No newline at end of file
@@ -1,14 +1,69 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event, func, inspect, text, bindparam, delete, insert, select, DateTime, String
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from sqlalchemy.pool import StaticPool, QueuePool
 from contextlib import contextmanager
-from typing import Generator
+from datetime import datetime, time, timedelta
+from itertools import islice
+from typing import Generator, Iterable
 import logging
-from config.settings import settings
-from .models import Base, PhoneModel, Platform, PriceRecord, PriceTrend, ScrapingSession, ExchangeRate
+import threading
+import uuid
+from config.settings import settings, PHONE_MODELS, PLATFORMS
+from .models import Base, PhoneModel, Platform, PriceRecord, PriceTrend, DailyPriceRollup, ScrapingSession, ExchangeRate
 
 logger = logging.getLogger(__name__)
 
+# Dashboard/status counters collapsed into one statement
+RECORD_STATS_SQL = text("""
+    SELECT
+        (SELECT COUNT(*) FROM price_records) AS total_records,
+        (SELECT COUNT(*) FROM price_records WHERE scrape_timestamp >= :cut) AS recent_records,
+        (SELECT COUNT(*) FROM phone_models WHERE is_active) AS active_models,
+        (SELECT COUNT(*) FROM platforms WHERE is_active) AS active_platforms
+""").bindparams(bindparam('cut', type_=DateTime))
+
+
+# Indexes superseded by wider ones in the models; dropped from existing databases
+RETIRED_INDEXES = (
+    'idx_scrape_timestamp',  # leading column of idx_pr_time_model_platform
+    'idx_phone_platform',  # leading columns of idx_price_lookup
+    'idx_pr_pair_time',  # same leading columns as idx_price_lookup
+)
+
+# Session-id columns stored as native uuid on PostgreSQL
+UUID_COLUMNS = (
+    ('price_records', 'scrape_session_id'),
+    ('scraping_sessions', 'session_id'),
+)
+# Legacy non-UUID session ids map to uuid5(namespace, old_id), the same value in every table
+LEGACY_SESSION_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_OID, 'smartphone-price-tracker.scrape_session_id')
+UUID_PATTERN = '^[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}$'
+
+# Monthly price_records partitions kept ready ahead of the current month (PostgreSQL)
+PARTITION_MONTHS_AHEAD = 2
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# scraper's writes, and the larger page cache/mmap cut repeated file reads
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune a freshly opened SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 class DatabaseManager:
     def __init__(self, database_url: str = None):
@@ -22,25 +77,176 @@ class DatabaseManager:
                 connect_args={"check_same_thread": False},
                 echo=False
             )
+            event.listen(self.engine, "connect", _set_sqlite_pragmas)
         else:
+            # Keep a warm pool so web requests and CLI commands reuse connections
             self.engine = create_engine(
                 self.database_url,
+                poolclass=QueuePool,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
                 pool_pre_ping=True,
-                pool_recycle=300,
+                pool_recycle=settings.db_pool_recycle,
                 echo=False
             )
         
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Thread-local sessions, so code on one thread shares a single Session via
+        # SessionLocal(). Read-only sessions (analysis, dashboards) also keep objects
+        # loaded across commits instead of re-SELECTing them on next access
+        self.SessionLocal = scoped_session(sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        ))
+        self.ReadSessionLocal = scoped_session(sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine
+        ))
+        # Per-thread nesting depth of get_session(), by kind
+        self._session_depth = threading.local()
     
     def create_tables(self):
         """Create all tables in the database"""
         try:
             Base.metadata.create_all(bind=self.engine)
+            self.ensure_indexes()
+            self.migrate_uuid_columns()
+            self.ensure_price_partitions()
+            self.backfill_daily_rollups()
             logger.info("Database tables created successfully")
         except Exception as e:
             logger.error(f"Error creating database tables: {e}")
             raise
     
+    def ensure_indexes(self):
+        """Create model indexes missing from tables that predate them, and drop retired ones"""
+        # create_all skips existing tables, so new indexes need a separate pass
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=self.engine, checkfirst=True)
+                except Exception as e:
+                    logger.warning(f"Could not create index {index.name}: {e}")
+        
+        for index_name in RETIRED_INDEXES:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+            except Exception as e:
+                logger.warning(f"Could not drop index {index_name}: {e}")
+    
+    def migrate_uuid_columns(self):
+        """Convert text session-id columns from older PostgreSQL schemas to native uuid"""
+        if self.engine.dialect.name != 'postgresql':
+            return
+        
+        columns = inspect(self.engine)
+        pending = [
+            (table, column) for table, column in UUID_COLUMNS
+            if isinstance(next(c['type'] for c in columns.get_columns(table) if c['name'] == column), String)
+        ]
+        if not pending:
+            return
+        
+        # Every column is rewritten and converted in one transaction, so parent and
+        # child ids either all move to the same uuid or nothing changes
+        try:
+            with self.engine.begin() as conn:
+                legacy_ids = set()
+                for table, column in pending:
+                    legacy_ids.update(conn.execute(
+                        text(f"SELECT DISTINCT {column} FROM {table} "
+                             f"WHERE {column} IS NOT NULL AND {column} !~* :pattern"),
+                        {'pattern': UUID_PATTERN}
+                    ).scalars())
+                
+                if legacy_ids:
+                    conn.execute(text(
+                        "CREATE TEMPORARY TABLE legacy_session_ids (old_id text PRIMARY KEY, new_id text NOT NULL) "
+                        "ON COMMIT DROP"
+                    ))
+                    conn.execute(
+                        text("INSERT INTO legacy_session_ids (old_id, new_id) VALUES (:old_id, :new_id)"),
+                        [{'old_id': old_id, 'new_id': str(uuid.uuid5(LEGACY_SESSION_ID_NAMESPACE, old_id))}
+                         for old_id in legacy_ids]
+                    )
+                    for table, column in pending:
+                        conn.execute(text(
+                            f"UPDATE {table} SET {column} = m.new_id FROM legacy_session_ids m "
+                            f"WHERE {table}.{column} = m.old_id"
+                        ))
+                
+                for table, column in pending:
+                    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid"))
+        except Exception as e:
+            logger.error(f"Session-id uuid migration failed and was rolled back; no ids were changed: {e}")
+            raise
+        
+        for table, column in pending:
+            logger.info(f"Converted {table}.{column} to uuid ({len(legacy_ids)} legacy ids remapped)")
+    
+    def _price_records_partitioned(self, conn) -> bool:
+        """Whether price_records is a PostgreSQL partitioned table (older databases are not)"""
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'price_records'::regclass"
+        )).first() is not None
+    
+    def ensure_price_partitions(self, months_ahead: int = PARTITION_MONTHS_AHEAD):
+        """Create monthly price_records partitions from this month through `months_ahead` ahead"""
+        if self.engine.dialect.name != 'postgresql':
+            return
+        
+        with self.engine.begin() as conn:
+            if not self._price_records_partitioned(conn):
+                return
+            # Catches rows outside the monthly ranges (e.g. backfilled history)
+            conn.execute(text("CREATE TABLE IF NOT EXISTS price_records_default PARTITION OF price_records DEFAULT"))
+        
+        month = datetime.utcnow().date().replace(day=1)
+        for _ in range(months_ahead + 1):
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS price_records_{month:%Y_%m} PARTITION OF price_records "
+                        f"FOR VALUES FROM ('{month}') TO ('{next_month}')"
+                    ))
+            except Exception as e:
+                # Fails when the default partition already holds rows for that month
+                logger.warning(f"Could not create partition price_records_{month:%Y_%m}: {e}")
+            month = next_month
+    
+    def _drop_expired_partitions(self, cutoff_date: datetime) -> int:
+        """Drop monthly price_records partitions that end before cutoff_date; returns rows removed"""
+        if self.engine.dialect.name != 'postgresql':
+            return 0
+        
+        dropped_rows = 0
+        with self.engine.begin() as conn:
+            if not self._price_records_partitioned(conn):
+                return 0
+            
+            partitions = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'price_records'::regclass"
+            )).scalars().all()
+            
+            for name in partitions:
+                try:
+                    month = datetime.strptime(name, 'price_records_%Y_%m')
+                except ValueError:
+                    continue  # the default partition
+                
+                if (month + timedelta(days=32)).replace(day=1) <= cutoff_date:
+                    dropped_rows += conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+                    conn.execute(text(f"DROP TABLE {name}"))
+                    logger.info(f"Dropped expired partition {name}")
+        
+        return dropped_rows
+    
+    def backfill_daily_rollups(self):
+        """Build the daily rollups once for databases that predate them"""
+        with self.get_session() as session:
+            if session.execute(select(DailyPriceRollup.id).limit(1)).first() is None:
+                self.refresh_daily_rollups(session)
+    
     def drop_tables(self):
         """Drop all tables in the database"""
         try:
@@ -51,64 +257,71 @@ class DatabaseManager:
             raise
     
     @contextmanager
-    def get_session(self) -> Generator[Session, None, None]:
-        """Get a database session with automatic cleanup"""
-        session = self.SessionLocal()
+    def get_session(self, read_only: bool = False) -> Generator[Session, None, None]:
+        """Get a database session with automatic cleanup; nested calls on a thread share it"""
+        registry = self.ReadSessionLocal if read_only else self.SessionLocal
+        kind = 'read' if read_only else 'write'
+        depth = getattr(self._session_depth, kind, 0)
+        session = registry()
+        setattr(self._session_depth, kind, depth + 1)
         try:
             yield session
-            session.commit()
+            # Only the outermost block ends the transaction; read-only sessions never commit
+            if depth == 0 and not read_only:
+                session.commit()
         except Exception as e:
-            session.rollback()
-            logger.error(f"Database session error: {e}")
+            if depth == 0:
+                session.rollback()
+                logger.error(f"Database session error: {e}")
             raise
         finally:
-            session.close()
+            setattr(self._session_depth, kind, depth)
+            if depth == 0:
+                registry.remove()
     
     def init_default_data(self):
         """Initialize database with default phone models and platforms"""
-        from config.settings import PHONE_MODELS, PLATFORMS, CURRENCIES
+        phone_rows = [
+            {'brand': brand.title(), 'model_name': model_name, 'storage_capacity': storage}
+            for brand, models in PHONE_MODELS.items()
+            for model_name, storage_options in models.items()
+            for storage in storage_options
+        ]
+        platform_rows = [
+            {
+                'name': platform_name,
+                'region': region,
+                'base_url': config["base_url"],
+                'scraper_type': config["scraper_type"],
+                'rate_limit': config["rate_limit"]
+            }
+            for region, platforms in PLATFORMS.items()
+            for platform_name, config in platforms.items()
+        ]
         
         with self.get_session() as session:
-            # Initialize phone models
-            for brand, models in PHONE_MODELS.items():
-                for model_name, storage_options in models.items():
-                    for storage in storage_options:
-                        existing = session.query(PhoneModel).filter_by(
-                            brand=brand.title(),
-                            model_name=model_name,
-                            storage_capacity=storage
-                        ).first()
-                        
-                        if not existing:
-                            phone_model = PhoneModel(
-                                brand=brand.title(),
-                                model_name=model_name,
-                                storage_capacity=storage
-                            )
-                            session.add(phone_model)
-                            logger.info(f"Added phone model: {brand.title()} {model_name} {storage}")
-            
-            # Initialize platforms
-            for region, platforms in PLATFORMS.items():
-                for platform_name, config in platforms.items():
-                    existing = session.query(Platform).filter_by(
-                        name=platform_name,
-                        region=region
-                    ).first()
-                    
-                    if not existing:
-                        platform = Platform(
-                            name=platform_name,
-                            region=region,
-                            base_url=config["base_url"],
-                            scraper_type=config["scraper_type"],
-                            rate_limit=config["rate_limit"]
-                        )
-                        session.add(platform)
-                        logger.info(f"Added platform: {platform_name} ({region})")
+            # One INSERT ... ON CONFLICT DO NOTHING per table instead of a SELECT + INSERT per row
+            self._insert_missing(session, PhoneModel, phone_rows, ['brand', 'model_name', 'storage_capacity'])
+            self._insert_missing(session, Platform, platform_rows, ['name', 'region'])
             
             session.commit()
-            logger.info("Default data initialization completed")
+            logger.info(f"Default data initialization completed "
+                        f"({len(phone_rows)} phone models, {len(platform_rows)} platforms)")
+    
+    def _insert_missing(self, session: Session, model, rows: list, index_elements: list):
+        """Bulk insert rows, skipping those that collide with the given unique key"""
+        if not rows:
+            return
+        
+        dialect = self.engine.dialect.name
+        if dialect == 'postgresql':
+            stmt = postgresql_insert(model.__table__).on_conflict_do_nothing(index_elements=index_elements)
+        elif dialect == 'sqlite':
+            stmt = sqlite_insert(model.__table__).on_conflict_do_nothing(index_elements=index_elements)
+        else:
+            stmt = model.__table__.insert().prefix_with('IGNORE')
+        
+        session.execute(stmt, rows)
     
     def get_phone_models(self, session: Session, active_only: bool = True):
         """Get all phone models"""
@@ -126,23 +339,76 @@ class DatabaseManager:
             query = query.filter(Platform.region == region)
         return query.all()
     
-    def save_price_records(self, session: Session, price_records: list, session_id: str = None):
+    def save_price_records(self, session: Session, price_records: Iterable[dict], session_id: str = None,
+                           chunk_size: int = 1000):
         """Save multiple price records efficiently"""
         try:
-            for record_data in price_records:
+            # Accepts any iterable (e.g. a generator) and only holds one chunk
+            # at a time; a Core executemany INSERT skips the ORM unit of work
+            # entirely, and everything still commits as one transaction
+            records = iter(price_records)
+            saved_count = 0
+            earliest = datetime.utcnow()
+            
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                
                 if session_id:
-                    record_data['scrape_session_id'] = session_id
+                    chunk = [{**record_data, 'scrape_session_id': session_id} for record_data in chunk]
                 
-                price_record = PriceRecord(**record_data)
-                session.add(price_record)
+                session.execute(insert(PriceRecord), chunk)
+                saved_count += len(chunk)
+                earliest = min([earliest] + [r['scrape_timestamp'] for r in chunk if r.get('scrape_timestamp')])
             
             session.commit()
-            logger.info(f"Saved {len(price_records)} price records")
-            return True
+            logger.info(f"Saved {saved_count} price records")
         except Exception as e:
             session.rollback()
             logger.error(f"Error saving price records: {e}")
             return False
+        
+        # The records are committed either way; a stale rollup is fixed by the next refresh
+        if saved_count:
+            try:
+                self.refresh_daily_rollups(session, since=earliest)
+            except Exception as e:
+                session.rollback()
+                logger.warning(f"Error refreshing daily price rollups: {e}")
+        
+        return True
+    
+    def refresh_daily_rollups(self, session: Session, since: datetime = None):
+        """Re-aggregate daily price rollups for every day from `since` (all days when None)"""
+        day = func.date(PriceRecord.scrape_timestamp)
+        source = select(
+            PriceRecord.phone_model_id,
+            PriceRecord.platform_id,
+            PriceRecord.condition,
+            day,
+            func.count(PriceRecord.price_usd),
+            func.sum(PriceRecord.price_usd),
+            func.sum(PriceRecord.price_usd * PriceRecord.price_usd),
+            func.min(PriceRecord.price_usd),
+            func.max(PriceRecord.price_usd)
+        ).where(PriceRecord.price_usd.isnot(None))\
+         .group_by(PriceRecord.phone_model_id, PriceRecord.platform_id, PriceRecord.condition, day)
+        stale = delete(DailyPriceRollup)
+        
+        if since is not None:
+            # Whole days only, so a partially refreshed day never mixes old and new sums
+            day_start = datetime.combine(since.date(), time.min)
+            source = source.where(PriceRecord.scrape_timestamp >= day_start)
+            stale = stale.where(DailyPriceRollup.day >= day_start.date())
+        
+        # Delete and re-insert in one transaction; readers see either version whole
+        session.execute(stale)
+        session.execute(insert(DailyPriceRollup).from_select([
+            'phone_model_id', 'platform_id', 'condition', 'day',
+            'record_count', 'sum_usd', 'sum_sq_usd', 'min_usd', 'max_usd'
+        ], source))
+        session.commit()
     
     def get_latest_prices(self, session: Session, phone_model_id: int = None, platform_id: int = None):
         """Get latest prices with optional filters"""
@@ -155,20 +421,57 @@ class DatabaseManager:
         
         return query.all()
     
-    def cleanup_old_records(self, session: Session, keep_days: int = 90):
-        """Clean up old price records to prevent database bloat"""
-        from datetime import datetime, timedelta
+    def get_record_stats(self, session: Session, recent_days: int = 7) -> dict:
+        """Get record/model/platform counts in a single round-trip"""
+        cutoff_date = datetime.utcnow() - timedelta(days=recent_days)
+        row = session.execute(RECORD_STATS_SQL, {'cut': cutoff_date}).one()
         
+        return {
+            'total_records': row.total_records,
+            'recent_records': row.recent_records,
+            'active_models': row.active_models,
+            'active_platforms': row.active_platforms
+        }
+    
+    def cleanup_old_records(self, session: Session, keep_days: int = 90, batch_size: int = 10_000):
+        """Clean up old price records to prevent database bloat"""
         cutoff_date = datetime.utcnow() - timedelta(days=keep_days)
+        # Whole expired months go in one DROP; the batches below only see the remainder
+        deleted_count = self._drop_expired_partitions(cutoff_date)
         
-        deleted_count = session.query(PriceRecord).filter(
-            PriceRecord.scrape_timestamp < cutoff_date
-        ).delete()
+        # Delete in bounded batches, committing each, so no single transaction
+        # holds the write lock (or grows the WAL) for the whole purge
+        deleted_count += self._delete_in_batches(
+            session, PriceRecord, PriceRecord.scrape_timestamp < cutoff_date, batch_size
+        )
+        # Rollup days that fall wholly before the cutoff summarize purged rows
+        rollup_count = self._delete_in_batches(
+            session, DailyPriceRollup, DailyPriceRollup.day < cutoff_date.date(), batch_size
+        )
         
-        session.commit()
-        logger.info(f"Cleaned up {deleted_count} old price records")
+        logger.info(f"Cleaned up {deleted_count} old price records and {rollup_count} daily rollups")
         return deleted_count
     
+    def _delete_in_batches(self, session: Session, model, condition, batch_size: int) -> int:
+        """Delete matching rows batch_size at a time, committing after each batch"""
+        deleted_count = 0
+        while True:
+            batch_ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+            
+            batch_count = session.execute(
+                delete(model).where(model.id.in_(batch_ids)),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            session.commit()
+            
+            deleted_count += batch_count
+            if batch_count < batch_size:
+                return deleted_count
+    
+    def pool_status(self) -> str:
+        """Describe the connection pool (checked in/out, overflow)"""
+        return self.engine.pool.status()
+    
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
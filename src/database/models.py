@@ -1,12 +1,41 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Boolean, ForeignKey, Index, Uuid
+from sqlalchemy import PrimaryKeyConstraint
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import os
+import time
 import uuid
 
 Base = declarative_base()
 
 
+@compiles(PrimaryKeyConstraint, 'postgresql')
+def _compile_primary_key(constraint, compiler, **kw):
+    """Append a partitioned table's partition key to its primary key, as PostgreSQL requires"""
+    partition_key = constraint.table.info.get('partition_key')
+    if not partition_key or partition_key in constraint.columns:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    
+    columns = [column.name for column in constraint.columns] + [partition_key]
+    return "PRIMARY KEY (%s)" % ", ".join(compiler.preparer.quote(name) for name in columns)
+
+
+def new_session_id() -> str:
+    """Time-ordered UUID (v7 layout), so scrape session ids still sort chronologically"""
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (
+        (unix_ms & (2 ** 48 - 1)) << 80
+        | 0x7 << 76                      # version
+        | ((rand >> 62) & 0xFFF) << 64
+        | 0b10 << 62                     # RFC 4122 variant
+        | (rand & (2 ** 62 - 1))
+    )
+    return str(uuid.UUID(int=value))
+
+
 class PhoneModel(Base):
     __tablename__ = 'phone_models'
     
@@ -18,12 +47,13 @@ class PhoneModel(Base):
     is_active = Column(Boolean, default=True)
     
     # Relationships
-    prices = relationship("PriceRecord", back_populates="phone_model")
+    prices = relationship("PriceRecord", back_populates="phone_model", lazy="raise")
     
     # Indexes
     __table_args__ = (
         Index('idx_brand_model', 'brand', 'model_name'),
         Index('idx_active_models', 'is_active'),
+        Index('ux_phone_model_key', 'brand', 'model_name', 'storage_capacity', unique=True),
     )
     
     def __repr__(self):
@@ -43,12 +73,13 @@ class Platform(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    prices = relationship("PriceRecord", back_populates="platform")
+    prices = relationship("PriceRecord", back_populates="platform", lazy="raise")
     
     # Indexes
     __table_args__ = (
         Index('idx_region', 'region'),
         Index('idx_active_platforms', 'is_active'),
+        Index('ux_platform_key', 'name', 'region', unique=True),
     )
     
     def __repr__(self):
@@ -69,19 +100,34 @@ class PriceRecord(Base):
     stock_count = Column(Integer)
     product_url = Column(Text)
     scrape_timestamp = Column(DateTime, default=datetime.utcnow)
-    scrape_session_id = Column(String(36), default=lambda: str(uuid.uuid4()))
+    # Native uuid on PostgreSQL (16 bytes, vs 36 for the text form); CHAR(32) elsewhere
+    scrape_session_id = Column(Uuid(as_uuid=False), default=new_session_id)
     
-    # Relationships
-    phone_model = relationship("PhoneModel", back_populates="prices")
-    platform = relationship("Platform", back_populates="prices")
+    # Relationships; lazy="raise" turns an accidental per-row lazy load into an
+    # error, so callers have to joinedload/contains_eager what they touch
+    phone_model = relationship("PhoneModel", back_populates="prices", lazy="raise")
+    platform = relationship("Platform", back_populates="prices", lazy="raise")
     
     # Indexes
     __table_args__ = (
-        Index('idx_phone_platform', 'phone_model_id', 'platform_id'),
-        Index('idx_scrape_timestamp', 'scrape_timestamp'),
+        # Time-range scans for charts/cleanup; covering on Postgres so the chart
+        # aggregates can run index-only (also serves plain timestamp lookups)
+        Index('idx_pr_time_model_platform', 'scrape_timestamp', 'phone_model_id', 'platform_id',
+              postgresql_include=['price_usd', 'condition']),
         Index('idx_condition', 'condition'),
         Index('idx_session', 'scrape_session_id'),
         Index('idx_price_usd', 'price_usd'),
+        # Analyzer lookups by combination, newest first; covering on Postgres (its
+        # leading columns also serve plain model/platform lookups)
+        Index('idx_price_lookup', 'phone_model_id', 'platform_id', 'condition', scrape_timestamp.desc(),
+              postgresql_include=['price_usd', 'availability']),
+        # Best-deal scans only ever look at priced, available rows
+        Index('idx_available_prices', 'phone_model_id', 'condition', 'price_usd', 'scrape_timestamp',
+              postgresql_where=price_usd.isnot(None) & (availability == True),
+              sqlite_where=price_usd.isnot(None) & (availability == True)),
+        # Monthly range partitions on PostgreSQL, so time-window scans skip old months
+        # and retention can drop whole partitions; ignored elsewhere
+        {'postgresql_partition_by': 'RANGE (scrape_timestamp)', 'info': {'partition_key': 'scrape_timestamp'}},
     )
     
     def __repr__(self):
@@ -115,8 +161,8 @@ class PriceTrend(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    phone_model = relationship("PhoneModel")
-    platform = relationship("Platform")
+    phone_model = relationship("PhoneModel", lazy="raise")
+    platform = relationship("Platform", lazy="raise")
     
     # Indexes
     __table_args__ = (
@@ -129,11 +175,38 @@ class PriceTrend(Base):
         return f"<PriceTrend(phone={self.phone_model_id}, change={self.price_change_percent}%)>"
 
 
+class DailyPriceRollup(Base):
+    __tablename__ = 'daily_price_rollups'
+    
+    id = Column(Integer, primary_key=True)
+    phone_model_id = Column(Integer, ForeignKey('phone_models.id'), nullable=False)
+    platform_id = Column(Integer, ForeignKey('platforms.id'), nullable=False)
+    condition = Column(String(20), nullable=False)
+    day = Column(Date, nullable=False)
+    
+    # Sums rather than averages, so any range of days recombines exactly
+    # (mean = sum_usd / record_count, variance from sum_sq_usd)
+    record_count = Column(Integer, nullable=False)
+    sum_usd = Column(Float, nullable=False)
+    sum_sq_usd = Column(Float, nullable=False)
+    min_usd = Column(Float)
+    max_usd = Column(Float)
+    
+    # Indexes
+    __table_args__ = (
+        Index('ux_daily_rollup_key', 'phone_model_id', 'platform_id', 'condition', 'day', unique=True),
+        Index('idx_rollup_day', 'day'),
+    )
+    
+    def __repr__(self):
+        return f"<DailyPriceRollup(phone={self.phone_model_id}, platform={self.platform_id}, day={self.day})>"
+
+
 class ScrapingSession(Base):
     __tablename__ = 'scraping_sessions'
     
     id = Column(Integer, primary_key=True)
-    session_id = Column(String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    session_id = Column(Uuid(as_uuid=False), unique=True, nullable=False, default=new_session_id)
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime)
     status = Column(String(20), default='running')  # running, completed, failed
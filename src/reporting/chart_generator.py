@@ -1,40 +1,223 @@
+import matplotlib
+matplotlib.use('Agg')  # Headless raster backend; must be selected before pyplot loads
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
 import plotly.graph_objects as go
-import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 import seaborn as sns
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Union
+from collections import OrderedDict
+import functools
+import inspect
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
 from datetime import datetime, timedelta
 import io
 import base64
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
-from ..database import PriceRecord, PhoneModel, Platform
+from sqlalchemy import and_, bindparam, func, desc, select, Date, DateTime
+from ..database import PriceRecord, PhoneModel, Platform, DailyPriceRollup
 from ..analysis import PriceAnalysis
 
 logger = logging.getLogger(__name__)
 
+# Chart statements are built once with bind parameters, so each call only binds
+# values (and hits SQLAlchemy's compiled cache) instead of rebuilding a Query
+_rollup_count = func.sum(DailyPriceRollup.record_count)
+_rollup_avg = func.sum(DailyPriceRollup.sum_usd) / _rollup_count
+_rollup_window = DailyPriceRollup.day >= bindparam('cutoff', type_=Date)
+
+
+def _daily_average_statement(per_model: bool):
+    """Per-model daily averages for the top_n most-tracked models, optionally for one phone model"""
+    window = _rollup_window
+    if per_model:
+        window = and_(window, DailyPriceRollup.phone_model_id == bindparam('phone_model_id'))
+    
+    top_models = select(
+        PhoneModel.brand,
+        PhoneModel.model_name
+    ).join_from(PhoneModel, DailyPriceRollup, DailyPriceRollup.phone_model_id == PhoneModel.id)\
+     .where(window)\
+     .group_by(PhoneModel.brand, PhoneModel.model_name)\
+     .order_by(desc(_rollup_count))\
+     .limit(bindparam('top_n')).subquery()
+    
+    return select(
+        PhoneModel.brand,
+        PhoneModel.model_name,
+        DailyPriceRollup.day,
+        _rollup_avg.label('avg_price')
+    ).join_from(DailyPriceRollup, PhoneModel, DailyPriceRollup.phone_model_id == PhoneModel.id)\
+     .join(top_models, and_(
+         PhoneModel.brand == top_models.c.brand,
+         PhoneModel.model_name == top_models.c.model_name
+     ))\
+     .where(window)\
+     .group_by(PhoneModel.brand, PhoneModel.model_name, DailyPriceRollup.day)\
+     .order_by(PhoneModel.brand, PhoneModel.model_name, DailyPriceRollup.day)
+
+
+DAILY_AVERAGE_SQL = _daily_average_statement(per_model=False)
+MODEL_DAILY_AVERAGE_SQL = _daily_average_statement(per_model=True)
+
+PLATFORM_AVERAGE_SQL = select(
+    Platform.name,
+    Platform.region,
+    _rollup_avg.label('avg_price'),
+    _rollup_count.label('record_count')
+).join_from(DailyPriceRollup, Platform, DailyPriceRollup.platform_id == Platform.id)\
+ .where(_rollup_window)\
+ .group_by(Platform.name, Platform.region)\
+ .having(_rollup_count >= 5)\
+ .order_by(desc('avg_price'))
+
+BRAND_PRICES_SQL = select(
+    PhoneModel.brand,
+    PriceRecord.price_usd,
+    PriceRecord.condition
+).join_from(PriceRecord, PhoneModel, PriceRecord.phone_model_id == PhoneModel.id)\
+ .where(
+     PriceRecord.scrape_timestamp >= bindparam('cutoff', type_=DateTime),
+     PriceRecord.price_usd.isnot(None)
+ )
+
+# Per model/platform moments recombined from the daily rollup sums; the
+# population std comes from E[x^2] - E[x]^2 on the small result
+VOLATILITY_SQL = select(
+    PhoneModel.brand,
+    PhoneModel.model_name,
+    Platform.name.label('platform'),
+    _rollup_avg.label('avg_price'),
+    (func.sum(DailyPriceRollup.sum_sq_usd) / _rollup_count).label('avg_square')
+).join_from(DailyPriceRollup, PhoneModel, DailyPriceRollup.phone_model_id == PhoneModel.id)\
+ .join(Platform, DailyPriceRollup.platform_id == Platform.id)\
+ .where(_rollup_window)\
+ .group_by(PhoneModel.id, Platform.id, PhoneModel.brand, PhoneModel.model_name, Platform.name)\
+ .having(_rollup_count >= 5)  # Need at least 5 data points
+
+# Rendered charts only change when new prices land, so in-memory (PNG bytes or
+# base64) output is reused until the newest scrape timestamp moves or the hourly
+# bucket rolls over
+CHART_CACHE_SECONDS = 3600
+CACHED_OUTPUT_FORMATS = ('png', 'base64')
+
+# 100 DPI keeps a 14x10in figure at 1400x1000px, plenty for email/screens and
+# a ninth of the pixels (and PNG encode time) of print resolution
+CHART_DPI = 100
+
+# zlib level for emailed PNGs; 1 encodes several times faster than the default 6
+# for a slightly larger image
+PNG_COMPRESS_LEVEL = 1
+
+# Rows fetched per round-trip when a chart reads raw price records
+CHART_FETCH_BATCH = 10_000
+CHART_CACHE_MAXSIZE = 32
+
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+
+def cached_chart(method: Callable):
+    """Memoize a generate_*_chart method's in-memory output per arguments and data version"""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name != 'self'}
+
+        # File output has a side effect the caller expects, so it is never cached;
+        # output_format is part of the key, so PNG bytes and base64 are kept apart
+        if arguments.get('output_format') not in CACHED_OUTPUT_FORMATS:
+            return method(self, *args, **kwargs)
+
+        key = (
+            method.__name__,
+            tuple(sorted(arguments.items())),
+            str(self.db_session.get_bind().url),
+            self._data_version(),
+            int(time.time() // CHART_CACHE_SECONDS)
+        )
+
+        with _chart_cache_lock:
+            if key in _chart_cache:
+                _chart_cache.move_to_end(key)
+                return _chart_cache[key]
+
+        value = method(self, *args, **kwargs)
+
+        if value is not None:
+            with _chart_cache_lock:
+                _chart_cache[key] = value
+                while len(_chart_cache) > CHART_CACHE_MAXSIZE:
+                    _chart_cache.popitem(last=False)
+
+        return value
+
+    return wrapper
+
+
+_style_applied = False
+_style_lock = threading.Lock()
+
+
+def _ensure_style():
+    """Apply the global matplotlib/seaborn style once per process"""
+    global _style_applied
+    if _style_applied:
+        return
+
+    with _style_lock:
+        if _style_applied:
+            return
+
+        # Set style preferences
+        plt.style.use('seaborn-v0_8')
+        sns.set_palette("husl")
+
+        # Configure matplotlib for better output
+        plt.rcParams.update({
+            'figure.figsize': (12, 8),
+            'font.size': 10,
+            'axes.titlesize': 14,
+            'axes.labelsize': 12
+        })
+        _style_applied = True
+
+
+def clear_chart_cache():
+    """Drop every cached chart"""
+    with _chart_cache_lock:
+        _chart_cache.clear()
+
 
 class ChartGenerator:
     """Generates charts and visualizations for price analysis"""
     
     def __init__(self, db_session: Session):
         self.db_session = db_session
+        _ensure_style()
         
-        # Set style preferences
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
-        
-        # Configure matplotlib for better output
-        plt.rcParams['figure.figsize'] = (12, 8)
-        plt.rcParams['font.size'] = 10
-        plt.rcParams['axes.titlesize'] = 14
-        plt.rcParams['axes.labelsize'] = 12
+        # One figure reused by every chart; a standalone Figure (not registered
+        # with pyplot) is cleared and resized per chart instead of rebuilt
+        self._fig = Figure(figsize=(14, 8))
+    
+    def _figure(self, figsize: tuple, nrows: int = 1, ncols: int = 1):
+        """Clear and resize the shared figure, returning it with fresh axes"""
+        self._fig.clear()
+        self._fig.set_size_inches(figsize)
+        return self._fig, self._fig.subplots(nrows, ncols)
     
+    @cached_chart
     def generate_price_trend_chart(self, 
                                  phone_model_id: int = None, 
                                  days_back: int = 30,
@@ -44,55 +227,25 @@ class ChartGenerator:
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days_back)
             
-            # Query price data
-            query = self.db_session.query(
-                PriceRecord.scrape_timestamp,
-                PriceRecord.price_usd,
-                PhoneModel.brand,
-                PhoneModel.model_name,
-                Platform.name.label('platform_name'),
-                PriceRecord.condition
-            ).join(PhoneModel, PriceRecord.phone_model_id == PhoneModel.id)\
-             .join(Platform, PriceRecord.platform_id == Platform.id)\
-             .filter(
-                 and_(
-                     PriceRecord.scrape_timestamp >= cutoff_date,
-                     PriceRecord.price_usd.isnot(None)
-                 )
-             )
-            
-            if phone_model_id:
-                query = query.filter(PriceRecord.phone_model_id == phone_model_id)
-            
-            data = query.all()
-            
-            if not data:
+            # Daily averages for the five most-tracked models, aggregated in SQL so
+            # only one row per model and day leaves the database
+            df = self._daily_averages(cutoff_date, phone_model_id)
+            
+            if df.empty:
                 logger.warning("No data found for price trend chart")
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'timestamp': record.scrape_timestamp,
-                'price_usd': record.price_usd,
-                'model': f"{record.brand} {record.model_name}",
-                'platform': record.platform_name,
-                'condition': record.condition
-            } for record in data])
+            df['model'] = df['brand'] + ' ' + df['model_name']
             
             # Create the chart
-            fig, ax = plt.subplots(figsize=(14, 8))
+            fig, ax = self._figure((14, 8))
             
-            # Group by model and plot trends
+            # Plot one line per model
             models = df['model'].unique()
             colors = plt.cm.Set3(np.linspace(0, 1, len(models)))
             
-            for i, model in enumerate(models[:5]):  # Limit to top 5 models
-                model_data = df[df['model'] == model]
-                
-                # Calculate daily averages to smooth the data
-                daily_avg = model_data.groupby(model_data['timestamp'].dt.date)['price_usd'].mean()
-                
-                ax.plot(daily_avg.index, daily_avg.values, 
+            for i, (model, daily_avg) in enumerate(df.groupby('model', sort=False)):
+                ax.plot(daily_avg['day'], daily_avg['avg_price'],
                        marker='o', linewidth=2, markersize=4,
                        label=model, color=colors[i])
             
@@ -106,9 +259,9 @@ class ChartGenerator:
             # Format x-axis
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
             ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, days_back // 10)))
-            plt.xticks(rotation=45)
+            ax.tick_params(axis='x', labelrotation=45)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
             return self._save_chart(fig, output_format)
             
@@ -116,6 +269,18 @@ class ChartGenerator:
             logger.error(f"Error generating price trend chart: {e}")
             return None
     
+    def _daily_averages(self, cutoff_date: datetime, phone_model_id: int = None, top_n: int = 5) -> pd.DataFrame:
+        """Per-model daily average prices since cutoff_date for the top_n most-tracked models"""
+        # Served from the daily rollups: one row per combination and day instead of every record
+        params = {'cutoff': cutoff_date.date(), 'top_n': top_n}
+        statement = DAILY_AVERAGE_SQL
+        if phone_model_id:
+            statement = MODEL_DAILY_AVERAGE_SQL
+            params['phone_model_id'] = phone_model_id
+        
+        return pd.read_sql_query(statement, self.db_session.connection(), params=params, parse_dates=['day'])
+    
+    @cached_chart
     def generate_platform_comparison_chart(self, output_format: str = 'base64') -> Optional[str]:
         """Generate platform comparison chart showing average prices"""
         
@@ -123,54 +288,32 @@ class ChartGenerator:
             # Get average prices by platform for recent data
             cutoff_date = datetime.utcnow() - timedelta(days=7)
             
-            platform_avg = self.db_session.query(
-                Platform.name,
-                Platform.region,
-                func.avg(PriceRecord.price_usd).label('avg_price'),
-                func.count(PriceRecord.id).label('record_count')
-            ).join(Platform, PriceRecord.platform_id == Platform.id)\
-             .filter(
-                 and_(
-                     PriceRecord.scrape_timestamp >= cutoff_date,
-                     PriceRecord.price_usd.isnot(None)
-                 )
-             ).group_by(Platform.name, Platform.region)\
-             .having(func.count(PriceRecord.id) >= 5)\
-             .order_by(desc('avg_price')).all()
-            
-            if not platform_avg:
+            df = pd.read_sql_query(PLATFORM_AVERAGE_SQL, self.db_session.connection(),
+                                   params={'cutoff': cutoff_date.date()})
+            
+            if df.empty:
                 logger.warning("No data found for platform comparison chart")
                 return None
             
-            # Create DataFrame
-            df = pd.DataFrame([{
-                'platform': f"{record.name}\n({record.region})",
-                'avg_price': float(record.avg_price),
-                'record_count': record.record_count
-            } for record in platform_avg])
+            df['platform'] = df['name'] + '\n(' + df['region'] + ')'
+            df['avg_price'] = df['avg_price'].astype(float)
             
             # Create chart
-            fig, ax = plt.subplots(figsize=(12, 8))
+            fig, ax = self._figure((12, 8))
             
             bars = ax.bar(df['platform'], df['avg_price'], 
                          color=plt.cm.viridis(np.linspace(0, 1, len(df))))
             
             # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.annotate(f'${height:.0f}',
-                           xy=(bar.get_x() + bar.get_width() / 2, height),
-                           xytext=(0, 3),
-                           textcoords="offset points",
-                           ha='center', va='bottom')
+            ax.bar_label(bars, fmt='${:.0f}', padding=3)
             
             ax.set_title('Average Prices by Platform (Last 7 Days)', fontsize=16, fontweight='bold')
             ax.set_xlabel('Platform')
             ax.set_ylabel('Average Price (USD)')
             ax.grid(True, alpha=0.3, axis='y')
             
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
+            plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+            fig.tight_layout()
             
             return self._save_chart(fig, output_format)
             
@@ -178,44 +321,35 @@ class ChartGenerator:
             logger.error(f"Error generating platform comparison chart: {e}")
             return None
     
+    @cached_chart
     def generate_brand_analysis_chart(self, output_format: str = 'base64') -> Optional[str]:
         """Generate brand analysis chart showing price distributions"""
         
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=30)
             
-            # Get price data by brand
-            brand_data = self.db_session.query(
-                PhoneModel.brand,
-                PriceRecord.price_usd,
-                PriceRecord.condition
-            ).join(PhoneModel, PriceRecord.phone_model_id == PhoneModel.id)\
-             .filter(
-                 and_(
-                     PriceRecord.scrape_timestamp >= cutoff_date,
-                     PriceRecord.price_usd.isnot(None)
-                 )
-             ).all()
-            
-            if not brand_data:
+            df = self._read_streamed(BRAND_PRICES_SQL, {'cutoff': cutoff_date})
+            
+            if df.empty:
                 logger.warning("No data found for brand analysis chart")
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'brand': record.brand,
-                'price_usd': record.price_usd,
-                'condition': record.condition
-            } for record in brand_data])
+            # Repeated labels become small integer codes and prices halve in width,
+            # so the groupbys below hash codes instead of strings
+            df = df.astype({'brand': 'category', 'condition': 'category', 'price_usd': np.float32})
             
             # Create subplots
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
+            fig, ((ax1, ax2), (ax3, ax4)) = self._figure((16, 12), 2, 2)
             
             # 1. Box plot by brand
-            brands = df['brand'].unique()
-            brand_prices = [df[df['brand'] == brand]['price_usd'].values for brand in brands]
-            
-            box_plot = ax1.boxplot(brand_prices, labels=brands, patch_artist=True)
+            # One groupby sweep instead of a full-frame mask per brand
+            brand_groups = [(brand, group.to_numpy()) for brand, group in df.groupby('brand', observed=True)['price_usd']]
+            brands = [brand for brand, _ in brand_groups]
+            brand_prices = [prices for _, prices in brand_groups]
+            
+            # Tick labels are set separately; boxplot's labels= was renamed in matplotlib 3.9
+            box_plot = ax1.boxplot(brand_prices, patch_artist=True)
+            ax1.set_xticks(range(1, len(brands) + 1), brands)
             colors = plt.cm.Set3(np.linspace(0, 1, len(brands)))
             for patch, color in zip(box_plot['boxes'], colors):
                 patch.set_facecolor(color)
@@ -225,23 +359,17 @@ class ChartGenerator:
             ax1.grid(True, alpha=0.3)
             
             # 2. Average price by brand
-            brand_avg = df.groupby('brand')['price_usd'].mean().sort_values(ascending=False)
+            brand_avg = df.groupby('brand', observed=True)['price_usd'].mean().sort_values(ascending=False)
             bars = ax2.bar(brand_avg.index, brand_avg.values, color=colors[:len(brand_avg)])
             ax2.set_title('Average Price by Brand')
             ax2.set_ylabel('Average Price (USD)')
             ax2.grid(True, alpha=0.3, axis='y')
             
             # Add value labels
-            for bar in bars:
-                height = bar.get_height()
-                ax2.annotate(f'${height:.0f}',
-                           xy=(bar.get_x() + bar.get_width() / 2, height),
-                           xytext=(0, 3),
-                           textcoords="offset points",
-                           ha='center', va='bottom')
+            ax2.bar_label(bars, fmt='${:.0f}', padding=3)
             
             # 3. Price by condition
-            condition_avg = df.groupby('condition')['price_usd'].mean().sort_values(ascending=False)
+            condition_avg = df.groupby('condition', observed=True)['price_usd'].mean().sort_values(ascending=False)
             ax3.pie(condition_avg.values, labels=condition_avg.index, autopct='%1.1f%%',
                    colors=plt.cm.Pastel1(np.linspace(0, 1, len(condition_avg))))
             ax3.set_title('Average Price Distribution by Condition')
@@ -252,8 +380,8 @@ class ChartGenerator:
                    colors=plt.cm.Set2(np.linspace(0, 1, len(brand_counts))))
             ax4.set_title('Market Share by Brand (Listings)')
             
-            plt.suptitle('Brand Analysis Overview', fontsize=18, fontweight='bold')
-            plt.tight_layout()
+            fig.suptitle('Brand Analysis Overview', fontsize=18, fontweight='bold')
+            fig.tight_layout()
             
             return self._save_chart(fig, output_format)
             
@@ -261,57 +389,32 @@ class ChartGenerator:
             logger.error(f"Error generating brand analysis chart: {e}")
             return None
     
+    @cached_chart
     def generate_volatility_chart(self, output_format: str = 'base64') -> Optional[str]:
         """Generate price volatility chart"""
         
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=30)
             
-            # Calculate volatility for each model/platform combination
-            volatility_data = []
-            
-            combinations = self.db_session.query(
-                PriceRecord.phone_model_id,
-                PriceRecord.platform_id
-            ).distinct().all()
-            
-            for phone_model_id, platform_id in combinations:
-                prices = self.db_session.query(PriceRecord.price_usd).filter(
-                    and_(
-                        PriceRecord.phone_model_id == phone_model_id,
-                        PriceRecord.platform_id == platform_id,
-                        PriceRecord.scrape_timestamp >= cutoff_date,
-                        PriceRecord.price_usd.isnot(None)
-                    )
-                ).all()
-                
-                if len(prices) >= 5:  # Need at least 5 data points
-                    price_values = [p.price_usd for p in prices]
-                    volatility = np.std(price_values) / np.mean(price_values) * 100  # CV%
-                    
-                    phone_model = self.db_session.query(PhoneModel).get(phone_model_id)
-                    platform = self.db_session.query(Platform).get(platform_id)
-                    
-                    if phone_model and platform:
-                        volatility_data.append({
-                            'model': f"{phone_model.brand} {phone_model.model_name}",
-                            'platform': platform.name,
-                            'volatility': volatility,
-                            'avg_price': np.mean(price_values)
-                        })
-            
-            if not volatility_data:
+            df = pd.read_sql_query(VOLATILITY_SQL, self.db_session.connection(),
+                                   params={'cutoff': cutoff_date.date()})
+            
+            if df.empty:
                 logger.warning("No data found for volatility chart")
                 return None
             
-            # Convert to DataFrame and sort by volatility
-            df = pd.DataFrame(volatility_data).sort_values('volatility', ascending=False)
+            df['model'] = df['brand'] + ' ' + df['model_name']
+            variance = (df['avg_square'] - df['avg_price'] ** 2).clip(lower=0)
+            df['volatility'] = np.sqrt(variance) / df['avg_price'] * 100  # CV%
+            
+            # Sort by volatility
+            df = df.sort_values('volatility', ascending=False)
             
             # Take top 15 most volatile
             df_top = df.head(15)
             
             # Create chart
-            fig, ax = plt.subplots(figsize=(14, 10))
+            fig, ax = self._figure((14, 10))
             
             # Create scatter plot
             scatter = ax.scatter(df_top['avg_price'], df_top['volatility'], 
@@ -330,7 +433,7 @@ class ChartGenerator:
             ax.set_ylabel('Price Volatility (CV %)')
             ax.grid(True, alpha=0.3)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
             return self._save_chart(fig, output_format)
             
@@ -341,66 +444,106 @@ class ChartGenerator:
     def generate_all_charts(self, output_format: str = 'base64') -> Dict[str, Optional[str]]:
         """Generate all charts for the report"""
         
-        charts = {}
-        
         chart_methods = [
-            ('price_trends', self.generate_price_trend_chart),
-            ('platform_comparison', self.generate_platform_comparison_chart),
-            ('brand_analysis', self.generate_brand_analysis_chart),
-            ('volatility_analysis', self.generate_volatility_chart)
+            ('price_trends', 'generate_price_trend_chart'),
+            ('platform_comparison', 'generate_platform_comparison_chart'),
+            ('brand_analysis', 'generate_brand_analysis_chart'),
+            ('volatility_analysis', 'generate_volatility_chart')
         ]
         
-        for chart_name, method in chart_methods:
-            try:
-                logger.info(f"Generating {chart_name} chart...")
-                chart_data = method(output_format=output_format)
-                charts[chart_name] = chart_data
-                
-                if chart_data:
-                    logger.info(f"Successfully generated {chart_name} chart")
-                else:
-                    logger.warning(f"Failed to generate {chart_name} chart")
-                    
-            except Exception as e:
-                logger.error(f"Error generating {chart_name} chart: {e}")
-                charts[chart_name] = None
+        engine = self.db_session.get_bind()
+        # The SQLite engine shares a single connection, so its charts stay sequential
+        if engine.dialect.name == 'sqlite':
+            return {
+                chart_name: self._generate_chart(chart_name, getattr(self, method_name), output_format)
+                for chart_name, method_name in chart_methods
+            }
+        
+        # Each chart mostly waits on its own query, so run them side by side; every
+        # worker gets its own Session and Figure (built here, on the calling thread)
+        sessions = [Session(bind=engine) for _ in chart_methods]
+        try:
+            workers = [ChartGenerator(session) for session in sessions]
+            with ThreadPoolExecutor(max_workers=len(chart_methods), thread_name_prefix='chart') as pool:
+                futures = {
+                    chart_name: pool.submit(worker._generate_chart, chart_name, getattr(worker, method_name), output_format)
+                    for worker, (chart_name, method_name) in zip(workers, chart_methods)
+                }
+                return {chart_name: future.result() for chart_name, future in futures.items()}
+        finally:
+            for session in sessions:
+                session.close()
+    
+    def _generate_chart(self, chart_name: str, method: Callable, output_format: str) -> Optional[str]:
+        """Run one chart method, logging the outcome"""
+        try:
+            logger.info(f"Generating {chart_name} chart...")
+            chart_data = method(output_format=output_format)
+            
+            if chart_data:
+                logger.info(f"Successfully generated {chart_name} chart")
+            else:
+                logger.warning(f"Failed to generate {chart_name} chart")
+            
+            return chart_data
+            
+        except Exception as e:
+            logger.error(f"Error generating {chart_name} chart: {e}")
+            return None
+    
+    def _read_streamed(self, statement, params: dict = None) -> pd.DataFrame:
+        """Read a raw-row query batch by batch (server-side cursor where supported)"""
+        result = self.db_session.execute(statement, params, execution_options={'yield_per': CHART_FETCH_BATCH})
+        try:
+            columns = list(result.keys())
+            frames = [pd.DataFrame.from_records(rows, columns=columns) for rows in result.partitions()]
+        finally:
+            result.close()
         
-        return charts
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
     
-    def _save_chart(self, fig: plt.Figure, output_format: str) -> Optional[str]:
+    def _data_version(self) -> Optional[datetime]:
+        """Newest scrape timestamp; any new price data changes it"""
+        return self.db_session.query(func.max(PriceRecord.scrape_timestamp)).scalar()
+    
+    def _save_chart(self, fig: Figure, output_format: str, dpi: int = CHART_DPI) -> Optional[Union[str, bytes]]:
         """Save chart in specified format"""
         
         try:
-            if output_format == 'base64':
-                # Save to base64 string for email embedding
-                buffer = io.BytesIO()
-                fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
-                           facecolor='white', edgecolor='none')
-                buffer.seek(0)
+            if output_format in ('png', 'base64'):
+                # One Agg draw straight to an RGBA buffer (tight_layout already set the
+                # margins), then a fast low-compression PNG encode in Pillow
+                fig.set_dpi(dpi)
+                canvas = FigureCanvasAgg(fig)
+                canvas.draw()
+                image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
                 
-                chart_base64 = base64.b64encode(buffer.getvalue()).decode()
+                buffer = io.BytesIO()
+                image.convert('RGB').save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+                png_bytes = buffer.getvalue()
                 buffer.close()
-                plt.close(fig)
                 
-                return chart_base64
+                # Raw PNG bytes go into email as cid: image parts; base64 text is for data: URIs
+                if output_format == 'png':
+                    return png_bytes
+                return base64.b64encode(png_bytes).decode()
                 
             elif output_format.startswith('file:'):
                 # Save to file
                 file_path = output_format.replace('file:', '')
-                fig.savefig(file_path, dpi=300, bbox_inches='tight', 
+                fig.savefig(file_path, dpi=dpi, bbox_inches='tight', 
                            facecolor='white', edgecolor='none')
-                plt.close(fig)
                 
                 return file_path
                 
             else:
                 logger.error(f"Unsupported output format: {output_format}")
-                plt.close(fig)
                 return None
                 
         except Exception as e:
             logger.error(f"Error saving chart: {e}")
-            plt.close(fig)
             return None
     
     def create_interactive_chart(self, chart_type: str = 'price_trends') -> Optional[str]:
@@ -425,42 +568,26 @@ class ChartGenerator:
         cutoff_date = datetime.utcnow() - timedelta(days=30)
         
         # Get data
-        data = self.db_session.query(
-            PriceRecord.scrape_timestamp,
-            PriceRecord.price_usd,
-            PhoneModel.brand,
-            PhoneModel.model_name,
-            Platform.name.label('platform_name')
-        ).join(PhoneModel, PriceRecord.phone_model_id == PhoneModel.id)\
-         .join(Platform, PriceRecord.platform_id == Platform.id)\
-         .filter(
-             and_(
-                 PriceRecord.scrape_timestamp >= cutoff_date,
-                 PriceRecord.price_usd.isnot(None)
-             )
-         ).all()
+        df = self._daily_averages(cutoff_date)
         
-        if not data:
+        if df.empty:
             return None
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'timestamp': record.scrape_timestamp,
-            'price_usd': record.price_usd,
-            'model': f"{record.brand} {record.model_name}",
-            'platform': record.platform_name
-        } for record in data])
+        df['model'] = df['brand'] + ' ' + df['model_name']
         
-        # Create interactive plot
-        fig = px.line(df, x='timestamp', y='price_usd', color='model',
-                     title='Interactive Price Trends (Last 30 Days)',
-                     labels={'price_usd': 'Price (USD)', 'timestamp': 'Date'})
+        # Create interactive plot; WebGL traces keep the browser responsive on long series
+        fig = go.Figure()
+        for model, daily_avg in df.groupby('model', sort=False):
+            fig.add_trace(go.Scattergl(x=daily_avg['day'], y=daily_avg['avg_price'],
+                                       mode='lines', name=model))
         
         fig.update_layout(
+            title='Interactive Price Trends (Last 30 Days)',
             xaxis_title="Date",
             yaxis_title="Price (USD)",
             hovermode='x unified',
             template='plotly_white'
         )
         
-        return fig.to_html(include_plotlyjs=True)
\ No newline at end of file
+        # Load plotly.js from the CDN rather than inlining the ~3MB bundle in every page
+        return fig.to_html(include_plotlyjs='cdn')
\ No newline at end of file
@@ -3,114 +3,41 @@ import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
-from typing import List, Dict, Any, Optional
+from email.generator import BytesGenerator
+from email.policy import SMTP as SMTP_POLICY
+from typing import List, Dict, Any, Optional, Union
 import logging
-from jinja2 import Environment, FileSystemLoader, Template
+from markupsafe import Markup, escape
+from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 from datetime import datetime
+import functools
+import operator
 import os
 import io
 import base64
+import re
+import uuid
+from config.settings import settings
 from ..analysis import PriceAnalysis, MarketInsight
 
 logger = logging.getLogger(__name__)
 
+WEEKLY_TEMPLATE_NAME = 'weekly_report.html'
+TEMPLATE_CACHE_SIZE = 200
 
-class EmailReporter:
-    """Handles email report generation and sending"""
-    
-    def __init__(self, smtp_config: dict, template_dir: str = "templates"):
-        self.smtp_server = smtp_config.get('smtp_server', 'smtp.gmail.com')
-        self.smtp_port = smtp_config.get('smtp_port', 587)
-        self.smtp_username = smtp_config.get('smtp_username', '')
-        self.smtp_password = smtp_config.get('smtp_password', '')
-        self.email_from = smtp_config.get('email_from', '')
-        
-        self.template_dir = template_dir
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(template_dir) if os.path.exists(template_dir) else None
-        )
-        
-        # Add custom filters
-        self.jinja_env.filters['currency'] = self._format_currency
-        self.jinja_env.filters['percent'] = self._format_percent
-        self.jinja_env.filters['datetime'] = self._format_datetime
-    
-    def generate_weekly_report(self, 
-                             price_analyses: List[PriceAnalysis],
-                             market_insights: List[MarketInsight],
-                             market_summary: Dict[str, Any],
-                             charts: Dict[str, Any] = None) -> str:
-        """Generate weekly HTML report"""
-        
-        # Organize data for template
-        report_data = {
-            'generated_at': datetime.utcnow(),
-            'summary': market_summary,
-            'price_analyses': price_analyses,
-            'market_insights': market_insights,
-            'charts': charts or {},
-            'stats': self._calculate_report_stats(price_analyses, market_insights)
-        }
-        
-        # Try to use custom template first
-        template = self._get_template('weekly_report.html')
-        if not template:
-            # Use built-in template
-            template = Template(self._get_builtin_template())
-        
-        return template.render(**report_data)
-    
-    def send_email_report(self, 
-                         recipients: List[str],
-                         subject: str,
-                         html_content: str,
-                         attachments: List[str] = None) -> bool:
-        """Send email report to recipients"""
-        
-        try:
-            # Create message
-            message = MIMEMultipart('alternative')
-            message['From'] = self.email_from
-            message['To'] = ', '.join(recipients)
-            message['Subject'] = subject
-            
-            # Add HTML content
-            html_part = MIMEText(html_content, 'html')
-            message.attach(html_part)
-            
-            # Add attachments if any
-            if attachments:
-                for attachment_path in attachments:
-                    if os.path.exists(attachment_path):
-                        self._add_attachment(message, attachment_path)
-            
-            # Send email
-            context = ssl.create_default_context()
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(message)
-            
-            logger.info(f"Email report sent successfully to {len(recipients)} recipients")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send email report: {e}")
-            return False
-    
-    def _get_template(self, template_name: str) -> Optional[Template]:
-        """Get Jinja2 template"""
-        try:
-            return self.jinja_env.get_template(template_name)
-        except Exception as e:
-            logger.warning(f"Could not load template {template_name}: {e}")
-            return None
-    
-    def _get_builtin_template(self) -> str:
-        """Get built-in HTML template"""
-        return """
+# Raw bytes read per attachment block; a multiple of 57 so each block encodes to whole 76-char lines
+ATTACHMENT_READ_BLOCK = 57 * 1024
+BASE64_LINE_LENGTH = 76
+# Dots that start a line inside a chunk; a dot at the chunk's start depends on the previous chunk
+DOT_STUFF_PATTERN = re.compile(rb'(?<=\n)\.')
+
+SMTP_TIMEOUT_SECONDS = 30
+# Recipients per SMTP transaction; the body is sent once per batch of RCPT TO commands
+RECIPIENT_BATCH_SIZE = 50
+
+_MODEL_KEY = operator.attrgetter('brand', 'phone_model')
+
+BUILTIN_WEEKLY_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -321,22 +248,7 @@ class EmailReporter:
                         </tr>
                     </thead>
                     <tbody>
-                        {% for analysis in price_analyses[:20] %}
-                        <tr>
-                            <td>{{ analysis.brand }} {{ analysis.phone_model }}</td>
-                            <td>{{ analysis.platform }} ({{ analysis.region }})</td>
-                            <td>{{ analysis.condition }}</td>
-                            <td>${{ analysis.current_price | currency }}</td>
-                            <td class="price-change {% if analysis.price_change_percent > 0 %}positive{% elif analysis.price_change_percent < 0 %}negative{% endif %}">
-                                {% if analysis.price_change_percent %}
-                                    {{ analysis.price_change_percent | percent }}%
-                                {% else %}
-                                    -
-                                {% endif %}
-                            </td>
-                            <td class="trend-{{ analysis.trend_direction }}">{{ analysis.trend_direction | title }}</td>
-                        </tr>
-                        {% endfor %}
+                        {{ price_rows }}
                     </tbody>
                 </table>
             </div>
@@ -364,7 +276,11 @@ class EmailReporter:
                 <div class="chart-container">
                     <h3>{{ chart_name | title }}</h3>
                     {% if chart_data %}
+                    {% if chart_data is string %}
                     <img src="data:image/png;base64,{{ chart_data }}" alt="{{ chart_name }}">
+                    {% else %}
+                    <img src="cid:{{ chart_name }}" alt="{{ chart_name }}">
+                    {% endif %}
                     {% endif %}
                 </div>
                 {% endfor %}
@@ -403,27 +319,289 @@ class EmailReporter:
 </body>
 </html>
         """
+
+
+def _minify_template(source: str) -> str:
+    """Collapse the template's indentation and CSS whitespace; it has no <pre> or whitespace-sensitive text"""
+    source = re.sub(
+        r'<style>(.*?)</style>',
+        lambda match: '<style>' + re.sub(r'\s*([{};:,])\s*', r'\1', ' '.join(match.group(1).split())) + '</style>',
+        source,
+        flags=re.S,
+    )
+    return '\n'.join(line.strip() for line in source.splitlines() if line.strip())
+
+
+BUILTIN_WEEKLY_TEMPLATE_MIN = _minify_template(BUILTIN_WEEKLY_TEMPLATE)
+
+DATETIME_FORMAT = "%B %d, %Y at %I:%M %p UTC"
+_currency = '{:,.2f}'.format
+_percent = '{:+.1f}'.format
+
+
+def _format_currency(value: float) -> str:
+    """Format currency value"""
+    return "N/A" if value is None else _currency(value)
+
+
+def _format_percent(value: float) -> str:
+    """Format percentage value"""
+    return "N/A" if value is None else _percent(value)
+
+
+def _format_datetime(value: datetime) -> str:
+    """Format datetime value"""
+    return value.strftime(DATETIME_FORMAT)
+
+
+# Price table rows are formatted in Python rather than a Jinja loop; fields are escaped first
+PRICE_TABLE_ROWS = 20
+PRICE_ROW_FORMAT = (
+    '<tr>\n'
+    '<td>{brand} {model}</td>\n'
+    '<td>{platform} ({region})</td>\n'
+    '<td>{condition}</td>\n'
+    '<td>${price}</td>\n'
+    '<td class="price-change {direction}">\n'
+    '{change}\n'
+    '</td>\n'
+    '<td class="trend-{trend}">{trend_title}</td>\n'
+    '</tr>'
+).format
+
+
+@functools.lru_cache(maxsize=4096)
+def _escape_text(value: Any) -> str:
+    """HTML-escape a field; brands, platforms and conditions repeat across rows"""
+    return str(escape(value))
+
+
+def _render_price_rows(price_analyses: List[PriceAnalysis]) -> Markup:
+    """Pre-render the price table body for the built-in template"""
+    rows = []
+    for analysis in price_analyses:
+        change = analysis.price_change_percent
+        trend = _escape_text(analysis.trend_direction)
+        rows.append(PRICE_ROW_FORMAT(
+            brand=_escape_text(analysis.brand),
+            model=_escape_text(analysis.phone_model),
+            platform=_escape_text(analysis.platform),
+            region=_escape_text(analysis.region),
+            condition=_escape_text(analysis.condition),
+            price=_format_currency(analysis.current_price),
+            direction='positive' if change and change > 0 else 'negative' if change and change < 0 else '',
+            change=f"{_percent(change)}%" if change else '-',
+            trend=trend,
+            trend_title=trend.title(),
+        ))
+    return Markup('\n'.join(rows))
+
+
+REPORT_FILTERS = {
+    'currency': _format_currency,
+    'percent': _format_percent,
+    'datetime': _format_datetime,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_environment(template_dir: str) -> Environment:
+    """One Jinja2 environment per template directory, shared by every EmailReporter"""
+    # Templates in template_dir win; the built-in report is the fallback. Either way
+    # it is parsed and compiled once, then served from the environment's cache.
+    # Custom weekly reports should emit the pre-rendered {{ price_rows }} for the
+    # price table rather than looping over price_analyses (see README)
+    loaders = [FileSystemLoader(template_dir)] if os.path.exists(template_dir) else []
+    loaders.append(DictLoader({WEEKLY_TEMPLATE_NAME: BUILTIN_WEEKLY_TEMPLATE_MIN}))
+
+    # trim_blocks/lstrip_blocks keep {% %} tags from leaving blank lines in the output.
+    # Outside development, cached templates are served without stat()ing their files
+    environment = Environment(loader=ChoiceLoader(loaders), cache_size=TEMPLATE_CACHE_SIZE,
+                              auto_reload=settings.price_tracker_dev,
+                              trim_blocks=True, lstrip_blocks=True,
+                              bytecode_cache=_bytecode_cache(settings.template_cache_dir))
+    # Plain functions, registered once per environment rather than per reporter
+    environment.filters.update(REPORT_FILTERS)
+    return environment
+
+
+@functools.lru_cache(maxsize=None)
+def _builtin_template(template_dir: str) -> Template:
+    """The built-in weekly report, compiled once, for when template_dir's copy fails to load"""
+    return _shared_environment(template_dir).from_string(BUILTIN_WEEKLY_TEMPLATE_MIN)
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """Default TLS context, built on first use; loading the CA bundle is the expensive part"""
+    return ssl.create_default_context()
+
+
+def _bytecode_cache(directory: str) -> Optional[FileSystemBytecodeCache]:
+    """On-disk cache of compiled templates, so a fresh process skips parsing and compiling"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Template bytecode cache disabled ({directory}): {e}")
+        return None
+    return FileSystemBytecodeCache(directory)
+
+
+class EmailReporter:
+    """Handles email report generation and sending"""
+    
+    def __init__(self, smtp_config: dict, template_dir: str = "templates"):
+        self.smtp_server = smtp_config.get('smtp_server', 'smtp.gmail.com')
+        self.smtp_port = smtp_config.get('smtp_port', 587)
+        self.smtp_username = smtp_config.get('smtp_username', '')
+        self.smtp_password = smtp_config.get('smtp_password', '')
+        self.email_from = smtp_config.get('email_from', '')
+        self._smtp = None
+        
+        self.template_dir = template_dir
+        self.jinja_env = _shared_environment(template_dir)
+    
+    def generate_weekly_report(self, 
+                             price_analyses: List[PriceAnalysis],
+                             market_insights: List[MarketInsight],
+                             market_summary: Dict[str, Any],
+                             charts: Dict[str, Any] = None) -> str:
+        """Generate weekly HTML report"""
+        
+        # Organize data for template
+        report_data = {
+            'generated_at': datetime.utcnow(),
+            'summary': market_summary,
+            'price_analyses': price_analyses,
+            'market_insights': market_insights,
+            'charts': charts or {},
+            'stats': self._calculate_report_stats(price_analyses, market_insights),
+            'price_rows': _render_price_rows(price_analyses[:PRICE_TABLE_ROWS])
+        }
+        
+        # Custom template if template_dir has one, else the built-in (both cached)
+        template = self._get_template(WEEKLY_TEMPLATE_NAME)
+        if template is None:
+            # A custom template that fails to load or compile shouldn't cost the report
+            template = _builtin_template(self.template_dir)
+        
+        return template.render(**report_data)
+    
+    def send_email_report(self, 
+                         recipients: List[str],
+                         subject: str,
+                         html_content: str,
+                         attachments: List[str] = None,
+                         inline_images: Dict[str, bytes] = None) -> bool:
+        """Send email report to recipients; inline_images are PNGs the HTML references as cid:<name>"""
+        
+        try:
+            # Create message
+            message = MIMEMultipart('alternative')
+            
+            # Add HTML content
+            html_part = MIMEText(html_content, 'html')
+            message.attach(html_part)
+            
+            # Attachments and charts go in as placeholders; their bytes are base64-encoded
+            # and streamed a block at a time during DATA
+            placeholders = {}
+            
+            # Charts travel as multipart/related image parts instead of data: URIs in the HTML
+            if inline_images:
+                body = message
+                message = MIMEMultipart('related')
+                message.attach(body)
+                for image_name, image_bytes in inline_images.items():
+                    if image_bytes:
+                        self._add_inline_image(message, image_name, image_bytes, placeholders)
+            
+            message['From'] = self.email_from
+            message['To'] = ', '.join(recipients)
+            message['Subject'] = subject
+            
+            if attachments:
+                for attachment_path in attachments:
+                    if os.path.exists(attachment_path):
+                        self._add_attachment(message, attachment_path, placeholders)
+            
+            # Send email, reusing the open connection when there is one
+            server = self._get_smtp()
+            refused = {}
+            try:
+                for start in range(0, len(recipients), RECIPIENT_BATCH_SIZE):
+                    batch = recipients[start:start + RECIPIENT_BATCH_SIZE]
+                    refused.update(self._send_streamed(server, message, batch, placeholders))
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self.close()
+                raise
+            
+            logger.info(f"Email report sent successfully to {len(recipients) - len(refused)} recipients")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to send email report: {e}")
+            return False
+    
+    def _get_smtp(self) -> smtplib.SMTP:
+        """Return the open SMTP connection, connecting and logging in if it is missing or dead"""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            server.starttls(context=_ssl_context())
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        
+        self._smtp = server
+        return server
+    
+    def close(self):
+        """Close the SMTP connection, if one is open"""
+        if self._smtp is None:
+            return
+        
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        finally:
+            self._smtp = None
+    
+    def _get_template(self, template_name: str) -> Optional[Template]:
+        """Get Jinja2 template"""
+        try:
+            return self.jinja_env.get_template(template_name)
+        except Exception as e:
+            logger.warning(f"Could not load template {template_name}: {e}")
+            return None
+    
+    def _get_builtin_template(self) -> str:
+        """Get built-in HTML template"""
+        return BUILTIN_WEEKLY_TEMPLATE_MIN
     
     def _calculate_report_stats(self, 
                                price_analyses: List[PriceAnalysis], 
                                market_insights: List[MarketInsight]) -> Dict[str, int]:
         """Calculate summary statistics for the report"""
         
-        unique_models = set()
-        unique_platforms = set()
-        significant_changes = 0
-        arbitrage_opportunities = 0
-        
-        for analysis in price_analyses:
-            unique_models.add(f"{analysis.brand} {analysis.phone_model}")
-            unique_platforms.add(analysis.platform)
-            
-            if abs(analysis.price_change_percent) >= 10:
-                significant_changes += 1
-        
-        for insight in market_insights:
-            if insight.insight_type == 'arbitrage':
-                arbitrage_opportunities += 1
+        unique_models = set(map(_MODEL_KEY, price_analyses))
+        unique_platforms = {analysis.platform for analysis in price_analyses}
+        significant_changes = sum(
+            1 for analysis in price_analyses
+            if analysis.price_change_percent is not None and abs(analysis.price_change_percent) >= 10
+        )
+        arbitrage_opportunities = sum(
+            1 for insight in market_insights if insight.insight_type == 'arbitrage'
+        )
         
         return {
             'total_models': len(unique_models),
@@ -432,14 +610,14 @@ class EmailReporter:
             'arbitrage_opportunities': arbitrage_opportunities
         }
     
-    def _add_attachment(self, message: MIMEMultipart, file_path: str):
-        """Add file attachment to email message"""
+    def _add_attachment(self, message: MIMEMultipart, file_path: str,
+                        placeholders: Dict[bytes, Union[str, bytes]]):
+        """Add a file attachment placeholder to the email message"""
         try:
-            with open(file_path, 'rb') as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-            
-            encoders.encode_base64(part)
+            token = f"attachment-{uuid.uuid4().hex}"
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(token)
+            part['Content-Transfer-Encoding'] = 'base64'
             
             part.add_header(
                 'Content-Disposition',
@@ -447,34 +625,106 @@ class EmailReporter:
             )
             
             message.attach(part)
+            placeholders[token.encode('ascii')] = file_path
             logger.debug(f"Added attachment: {file_path}")
             
         except Exception as e:
             logger.error(f"Failed to add attachment {file_path}: {e}")
     
-    def _format_currency(self, value: float) -> str:
-        """Format currency value"""
-        if value is None:
-            return "N/A"
-        return f"{value:,.2f}"
+    def _add_inline_image(self, message: MIMEMultipart, image_name: str, image_bytes: bytes,
+                          placeholders: Dict[bytes, Union[str, bytes]]):
+        """Add a PNG placeholder the HTML can reference as cid:<image_name>"""
+        token = f"image-{uuid.uuid4().hex}"
+        part = MIMEBase('image', 'png')
+        part.set_payload(token)
+        part['Content-Transfer-Encoding'] = 'base64'
+        part['Content-ID'] = f'<{image_name}>'
+        part.add_header('Content-Disposition', 'inline', filename=f'{image_name}.png')
+        
+        message.attach(part)
+        placeholders[token.encode('ascii')] = image_bytes
+    
+    def _iter_attachment_base64(self, source: Union[str, bytes]):
+        """Yield a file path's (or in-memory image's) bytes as base64 lines, a block at a time"""
+        with (io.BytesIO(source) if isinstance(source, bytes) else open(source, 'rb')) as attachment:
+            first = True
+            while True:
+                block = attachment.read(ATTACHMENT_READ_BLOCK)
+                if not block:
+                    break
+                
+                encoded = base64.b64encode(block)
+                lines = b'\r\n'.join(
+                    encoded[i:i + BASE64_LINE_LENGTH] for i in range(0, len(encoded), BASE64_LINE_LENGTH)
+                )
+                yield lines if first else b'\r\n' + lines
+                first = False
     
-    def _format_percent(self, value: float) -> str:
-        """Format percentage value"""
-        if value is None:
-            return "N/A"
-        return f"{value:+.1f}"
+    def _iter_message_bytes(self, message: MIMEMultipart, placeholders: Dict[bytes, Union[str, bytes]]):
+        """Yield the wire form of the message, splicing attachment bodies in place of their placeholders"""
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, policy=SMTP_POLICY).flatten(message)
+        skeleton = buffer.getvalue()
+        
+        if not placeholders:
+            yield skeleton
+            return
+        
+        pattern = re.compile(b'(' + b'|'.join(re.escape(token) for token in placeholders) + b')')
+        for index, piece in enumerate(pattern.split(skeleton)):
+            if index % 2:
+                yield from self._iter_attachment_base64(placeholders[piece])
+            else:
+                yield piece
     
-    def _format_datetime(self, value: datetime) -> str:
-        """Format datetime value"""
-        return value.strftime("%B %d, %Y at %I:%M %p UTC")
+    def _send_streamed(self, server: smtplib.SMTP, message: MIMEMultipart, recipients: List[str],
+                       placeholders: Dict[bytes, Union[str, bytes]]) -> Dict[str, tuple]:
+        """Send the message without building it in memory; like sendmail, returns refused recipients"""
+        server.ehlo_or_helo_if_needed()
+        
+        code, response = server.mail(self.email_from)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, response, self.email_from)
+        
+        refused = {}
+        for recipient in recipients:
+            code, response = server.rcpt(recipient)
+            if code not in (250, 251):
+                refused[recipient] = (code, response)
+        if len(refused) == len(recipients):
+            server.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if refused:
+            logger.warning(f"Recipients refused by the mail server: {refused}")
+        
+        code, response = server.docmd('data')
+        if code != 354:
+            raise smtplib.SMTPDataError(code, response)
+        
+        ends_with_newline = True
+        for chunk in self._iter_message_bytes(message, placeholders):
+            if not chunk:
+                continue
+            # SMTP transparency: a line starting with '.' gets the dot doubled. Chunks
+            # can split mid-line, so a leading dot only starts a line after a CRLF
+            stuffed = DOT_STUFF_PATTERN.sub(b'..', chunk)
+            if ends_with_newline and stuffed.startswith(b'.'):
+                stuffed = b'.' + stuffed
+            server.send(stuffed)
+            ends_with_newline = chunk.endswith(b'\r\n')
+        
+        server.send(b'.\r\n' if ends_with_newline else b'\r\n.\r\n')
+        code, response = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, response)
+        
+        return refused
     
     def test_email_connection(self) -> bool:
         """Test email server connection"""
         try:
-            context = ssl.create_default_context()
-            
             with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
+                server.starttls(context=_ssl_context())
                 server.login(self.smtp_username, self.smtp_password)
             
             logger.info("Email connection test successful")
@@ -487,8 +737,14 @@ class EmailReporter:
     def save_report_to_file(self, html_content: str, file_path: str) -> bool:
         """Save HTML report to file"""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Encode once and write the bytes in one call, skipping the text-mode codec layer
+            data = html_content.encode('utf-8')
+            with open(file_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                # A saved report is write-once; don't let it crowd the page cache
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
             
             logger.info(f"Report saved to {file_path}")
             return True
@@ -1,16 +1,17 @@
 import schedule
-import time
 import asyncio
 from typing import Callable, List, Dict, Any
-from datetime import datetime, timedelta
-import logging
-from threading import Thread
+from datetime import datetime
+from threading import Event, Thread
 import signal
 import sys
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Longest the scheduler thread sleeps without re-checking, even with no job due sooner
+MAX_IDLE_SECONDS = 3600
+
 
 class TaskScheduler:
     """Handles scheduling of scraping and reporting tasks"""
@@ -19,6 +20,7 @@ class TaskScheduler:
         self.running = False
         self.scheduler_thread = None
         self.tasks = []
+        self._wake_event = Event()
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -35,6 +37,7 @@ class TaskScheduler:
                 'time': time_str,
                 'job': job
             })
+            self._wake_event.set()
             logger.info(f"Scheduled weekly task {func.__name__} for {day} at {time_str}")
         except Exception as e:
             logger.error(f"Error scheduling weekly task: {e}")
@@ -49,6 +52,7 @@ class TaskScheduler:
                 'time': time_str,
                 'job': job
             })
+            self._wake_event.set()
             logger.info(f"Scheduled daily task {func.__name__} at {time_str}")
         except Exception as e:
             logger.error(f"Error scheduling daily task: {e}")
@@ -63,6 +67,7 @@ class TaskScheduler:
                 'minute': minute,
                 'job': job
             })
+            self._wake_event.set()
             logger.info(f"Scheduled hourly task {func.__name__} at minute {minute}")
         except Exception as e:
             logger.error(f"Error scheduling hourly task: {e}")
@@ -77,6 +82,7 @@ class TaskScheduler:
                 'interval_minutes': interval_minutes,
                 'job': job
             })
+            self._wake_event.set()
             logger.info(f"Scheduled interval task {func.__name__} every {interval_minutes} minutes")
         except Exception as e:
             logger.error(f"Error scheduling interval task: {e}")
@@ -95,6 +101,7 @@ class TaskScheduler:
     def stop(self):
         """Stop the scheduler"""
         self.running = False
+        self._wake_event.set()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
         logger.info("Task scheduler stopped")
@@ -104,12 +111,22 @@ class TaskScheduler:
         logger.info("Scheduler thread started")
         
         while self.running:
+            # Clear before looking at the schedule, so a task added (or a stop) while
+            # jobs run or the timeout is computed still wakes the wait below
+            self._wake_event.clear()
             try:
                 schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                # Sleep until the next job is due; adding a task or stopping sets the event
+                idle = schedule.idle_seconds()
+                timeout = MAX_IDLE_SECONDS if idle is None else max(0, min(idle, MAX_IDLE_SECONDS))
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(60)  # Continue after error
+                timeout = 60  # Continue after error
+            
+            # stop() clears running before setting the event, so a stop that raced the clear is seen here
+            if not self.running:
+                break
+            self._wake_event.wait(timeout)
         
         logger.info("Scheduler thread stopped")
     
@@ -142,6 +159,7 @@ class TaskScheduler:
         """Clear all scheduled tasks"""
         schedule.clear()
         self.tasks.clear()
+        self._wake_event.set()
         logger.info("All scheduled tasks cleared")
     
     def run_task_now(self, func: Callable):
@@ -160,6 +178,7 @@ class AsyncTaskScheduler:
         self.running = False
         self.tasks = []
         self.loop = None
+        self._runners = []
     
     def add_async_task(self, coro_func: Callable, interval_minutes: int):
         """Add an async task that runs at specified intervals"""
@@ -177,36 +196,39 @@ class AsyncTaskScheduler:
             return
         
         self.running = True
-        self.loop = asyncio.get_event_loop()
+        self.loop = asyncio.get_running_loop()
         
         logger.info("Async task scheduler started")
         
+        # One timer coroutine per task, so tasks run concurrently and sleep until they are due.
+        # stop() cancels the runners; cancelling start() itself cancels them through gather
+        self._runners = [asyncio.create_task(self._run_periodic(task)) for task in self.tasks]
+        try:
+            await asyncio.gather(*self._runners)
+        except asyncio.CancelledError:
+            if self.running:
+                raise
+        finally:
+            self._runners = []
+    
+    async def _run_periodic(self, task: Dict[str, Any]):
+        """Run one task every interval_minutes, measuring the interval from each run's start"""
+        interval = task['interval_minutes'] * 60
+        
         while self.running:
-            current_time = datetime.utcnow()
-            
-            for task in self.tasks:
-                try:
-                    should_run = False
-                    
-                    if task['last_run'] is None:
-                        should_run = True
-                    else:
-                        time_since_last = current_time - task['last_run']
-                        if time_since_last >= timedelta(minutes=task['interval_minutes']):
-                            should_run = True
-                    
-                    if should_run:
-                        logger.info(f"Running async task {task['function'].__name__}")
-                        await task['function']()
-                        task['last_run'] = current_time
-                        
-                except Exception as e:
-                    logger.error(f"Error running async task {task['function'].__name__}: {e}")
+            started = self.loop.time()
+            try:
+                logger.info(f"Running async task {task['function'].__name__}")
+                await task['function']()
+                task['last_run'] = datetime.utcnow()
+            except Exception as e:
+                logger.error(f"Error running async task {task['function'].__name__}: {e}")
             
-            # Sleep for 1 minute before next check
-            await asyncio.sleep(60)
+            await asyncio.sleep(max(0, interval - (self.loop.time() - started)))
     
     def stop(self):
         """Stop the async scheduler"""
         self.running = False
+        for runner in self._runners:
+            runner.cancel()
         logger.info("Async task scheduler stopped")
\ No newline at end of file
@@ -1,6 +1,31 @@
-from .base_scraper import BaseScraper, PriceData, MockScraper
-from .swappa_scraper import SwappaScraper, BackMarketScraper  
-from .scraper_factory import ScraperFactory
+import importlib
+
+# Submodules are imported on first attribute access (PEP 562), so importing the
+# package for one name doesn't pull in requests, bs4 and fake_useragent up front
+_LAZY_EXPORTS = {
+    'BaseScraper': '.base_scraper',
+    'PriceData': '.base_scraper',
+    'MockScraper': '.base_scraper',
+    'create_http_session': '.base_scraper',
+    'SwappaScraper': '.swappa_scraper',
+    'BackMarketScraper': '.swappa_scraper',
+    'ScraperFactory': '.scraper_factory',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 __all__ = [
     'BaseScraper',
@@ -8,5 +33,6 @@ __all__ = [
     'MockScraper',
     'SwappaScraper',
     'BackMarketScraper',
-    'ScraperFactory'
+    'ScraperFactory',
+    'create_http_session'
 ]
\ No newline at end of file
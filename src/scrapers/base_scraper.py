@@ -3,15 +3,30 @@ from typing import List, Dict, Any, Optional
 import time
 import random
 import requests
+from requests.adapters import HTTPAdapter
 from fake_useragent import UserAgent
 import logging
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def create_http_session(pool_connections: int = 100, pool_maxsize: int = 8) -> requests.Session:
+    """Create a keep-alive HTTP session that several scrapers can share"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# dataclass(slots=True) needs Python 3.10; older interpreters get a regular dataclass
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class PriceData:
     phone_model: str
     brand: str
@@ -32,7 +47,8 @@ class PriceData:
 
 
 class BaseScraper(ABC):
-    def __init__(self, platform_config: Dict[str, Any], proxy_list: List[str] = None):
+    def __init__(self, platform_config: Dict[str, Any], proxy_list: List[str] = None,
+                 http_session: Optional[requests.Session] = None):
         self.platform_name = platform_config.get('name', '')
         self.base_url = platform_config.get('base_url', '')
         self.region = platform_config.get('region', '')
@@ -41,26 +57,27 @@ class BaseScraper(ABC):
         self.proxy_list = proxy_list or []
         
         self.user_agent = UserAgent()
-        self.session = requests.Session()
+        self.session = http_session or requests.Session()
         self.last_request_time = 0
         
-        # Set default headers
-        self.session.headers.update({
+        # Default headers; kept per scraper and sent with each request, since the
+        # session may be shared with other scrapers running on worker threads
+        self.headers = {
             'User-Agent': self.user_agent.random,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
-        })
+        }
     
-    def _wait_for_rate_limit(self):
-        """Enforce rate limiting between requests"""
+    async def _wait_for_rate_limit(self):
+        """Enforce rate limiting between requests without blocking the event loop"""
         current_time = time.time()
         time_since_last_request = current_time - self.last_request_time
         
         if time_since_last_request < self.rate_limit:
             sleep_time = self.rate_limit - time_since_last_request
-            time.sleep(sleep_time)
+            await asyncio.sleep(sleep_time)
         
         self.last_request_time = time.time()
     
@@ -75,21 +92,23 @@ class BaseScraper(ABC):
             'https': f'https://{proxy}'
         }
     
-    def _make_request(self, url: str, **kwargs) -> Optional[requests.Response]:
+    async def _make_request(self, url: str, **kwargs) -> Optional[requests.Response]:
         """Make a request with rate limiting and error handling"""
-        self._wait_for_rate_limit()
+        await self._wait_for_rate_limit()
         
         # Rotate user agent occasionally
         if random.random() < 0.1:  # 10% chance
-            self.session.headers['User-Agent'] = self.user_agent.random
+            self.headers['User-Agent'] = self.user_agent.random
         
         try:
             # Use proxy if available
             if self.proxy_list and random.random() < 0.3:  # 30% chance to use proxy
                 kwargs['proxies'] = self._get_proxy()
             
+            kwargs['headers'] = {**self.headers, **kwargs.get('headers', {})}
             kwargs.setdefault('timeout', 30)
-            response = self.session.get(url, **kwargs)
+            # requests is blocking; run it on a worker thread so other scrapers keep going
+            response = await asyncio.to_thread(self.session.get, url, **kwargs)
             response.raise_for_status()
             
             logger.debug(f"Successfully scraped {url}")
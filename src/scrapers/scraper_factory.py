@@ -1,7 +1,8 @@
-from typing import Dict, List, Type
+from typing import Dict, List, Optional, Type, Union
+import importlib
 import logging
-from .base_scraper import BaseScraper, MockScraper
-from .swappa_scraper import SwappaScraper, BackMarketScraper
+import requests
+from .base_scraper import BaseScraper, MockScraper, PriceData
 
 logger = logging.getLogger(__name__)
 
@@ -9,10 +10,11 @@ logger = logging.getLogger(__name__)
 class ScraperFactory:
     """Factory class to create appropriate scrapers for different platforms"""
     
-    _scraper_classes: Dict[str, Type[BaseScraper]] = {
-        'Swappa': SwappaScraper,
-        'Back Market': BackMarketScraper,
-        'Back Market EU': BackMarketScraper,
+    # "module.Class" entries are imported on first use; bs4 only loads once an HTML scraper is needed
+    _scraper_classes: Dict[str, Union[str, Type[BaseScraper]]] = {
+        'Swappa': 'swappa_scraper.SwappaScraper',
+        'Back Market': 'swappa_scraper.BackMarketScraper',
+        'Back Market EU': 'swappa_scraper.BackMarketScraper',
         'Gazelle': MockScraper,  # Using mock for now
         'eBay Refurbished': MockScraper,  # Using mock for now
         'Refurbed': MockScraper,
@@ -27,10 +29,13 @@ class ScraperFactory:
     
     @classmethod
     def create_scraper(cls, platform_name: str, platform_config: dict, 
-                      proxy_list: List[str] = None) -> BaseScraper:
+                      proxy_list: List[str] = None,
+                      http_session: Optional[requests.Session] = None) -> BaseScraper:
         """Create a scraper instance for the given platform"""
         
         scraper_class = cls._scraper_classes.get(platform_name)
+        if isinstance(scraper_class, str):
+            scraper_class = cls._resolve_scraper_class(platform_name, scraper_class)
         
         if not scraper_class:
             logger.warning(f"No specific scraper found for {platform_name}, using MockScraper")
@@ -38,7 +43,7 @@ class ScraperFactory:
         
         try:
             config_with_name = {**platform_config, 'name': platform_name}
-            scraper = scraper_class(config_with_name, proxy_list)
+            scraper = scraper_class(config_with_name, proxy_list, http_session)
             logger.info(f"Created scraper for {platform_name}")
             return scraper
             
@@ -46,7 +51,15 @@ class ScraperFactory:
             logger.error(f"Failed to create scraper for {platform_name}: {e}")
             # Fallback to MockScraper
             config_with_name = {**platform_config, 'name': platform_name}
-            return MockScraper(config_with_name, proxy_list)
+            return MockScraper(config_with_name, proxy_list, http_session)
+    
+    @classmethod
+    def _resolve_scraper_class(cls, platform_name: str, dotted_name: str) -> Type[BaseScraper]:
+        """Import a lazily registered scraper class and cache it in the registry"""
+        module_name, class_name = dotted_name.rsplit('.', 1)
+        scraper_class = getattr(importlib.import_module(f'.{module_name}', __package__), class_name)
+        cls._scraper_classes[platform_name] = scraper_class
+        return scraper_class
     
     @classmethod
     def get_available_platforms(cls) -> List[str]:
@@ -82,8 +95,9 @@ class GazelleScraper(BaseScraper):
 class EbayScraper(BaseScraper):
     """Scraper for eBay Refurbished section"""
     
-    def __init__(self, platform_config: dict, proxy_list: List[str] = None):
-        super().__init__(platform_config, proxy_list)
+    def __init__(self, platform_config: dict, proxy_list: List[str] = None,
+                 http_session: Optional[requests.Session] = None):
+        super().__init__(platform_config, proxy_list, http_session)
         self.api_key = platform_config.get('api_key')
     
     async def scrape_phone_prices(self, phone_models: List[str]) -> List[PriceData]:
@@ -3,6 +3,7 @@ from bs4 import BeautifulSoup
 import re
 import asyncio
 import logging
+import requests
 from .base_scraper import BaseScraper, PriceData
 
 logger = logging.getLogger(__name__)
@@ -11,8 +12,9 @@ logger = logging.getLogger(__name__)
 class SwappaScraper(BaseScraper):
     """Scraper for Swappa.com - US marketplace for used phones"""
     
-    def __init__(self, platform_config: dict, proxy_list: List[str] = None):
-        super().__init__(platform_config, proxy_list)
+    def __init__(self, platform_config: dict, proxy_list: List[str] = None,
+                 http_session: Optional[requests.Session] = None):
+        super().__init__(platform_config, proxy_list, http_session)
         self.base_search_url = f"{self.base_url}/buy"
     
     async def scrape_phone_prices(self, phone_models: List[str]) -> List[PriceData]:
@@ -29,7 +31,7 @@ class SwappaScraper(BaseScraper):
                 search_url = self.build_search_url(brand, model, storage)
                 
                 # Make request
-                response = self._make_request(search_url)
+                response = await self._make_request(search_url)
                 if not response:
                     logger.warning(f"Failed to fetch {search_url}")
                     continue
@@ -200,8 +202,9 @@ class SwappaScraper(BaseScraper):
 class BackMarketScraper(BaseScraper):
     """Scraper for Back Market - focuses on refurbished devices"""
     
-    def __init__(self, platform_config: dict, proxy_list: List[str] = None):
-        super().__init__(platform_config, proxy_list)
+    def __init__(self, platform_config: dict, proxy_list: List[str] = None,
+                 http_session: Optional[requests.Session] = None):
+        super().__init__(platform_config, proxy_list, http_session)
         # Back Market has an API, but we'll use web scraping as fallback
         self.api_key = platform_config.get('api_key')
     
@@ -220,7 +223,7 @@ class BackMarketScraper(BaseScraper):
                 logger.info(f"Scraping Back Market for {brand} {model} {storage}")
                 
                 search_url = self.build_search_url(brand, model, storage)
-                response = self._make_request(search_url)
+                response = await self._make_request(search_url)
                 
                 if response:
                     prices = self._parse_back_market_listings(response.text, brand, model, storage)
@@ -1,9 +1,11 @@
 from .logger import setup_logging, get_logger, LoggerContext, TimedLogger, log_function_call
+from .cache import ttl_cache
 
 __all__ = [
     'setup_logging',
     'get_logger', 
     'LoggerContext',
     'TimedLogger',
-    'log_function_call'
+    'log_function_call',
+    'ttl_cache'
 ]
\ No newline at end of file
@@ -0,0 +1,43 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+def ttl_cache(timeout: float = 300, maxsize: int = 128):
+    """Decorator that memoizes results per argument set for `timeout` seconds"""
+    def decorator(func: Callable):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+
+            with lock:
+                entry = cache.get(key)
+                if entry and entry[1] > now:
+                    cache.move_to_end(key)
+                    return entry[0]
+
+            value = func(*args, **kwargs)
+
+            with lock:
+                cache[key] = (value, now + timeout)
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+            return value
+
+        def cache_clear():
+            """Drop every cached entry"""
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
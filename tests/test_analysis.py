@@ -1,7 +1,8 @@
 import pytest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime, timedelta
 from decimal import Decimal
+import numpy as np
 
 from src.analysis import PriceAnalyzer, PriceAnalysis, MarketInsight, CurrencyConverter
 from src.database import PriceRecord, PhoneModel, Platform
@@ -57,6 +58,93 @@ class TestCurrencyConverter:
         rate = converter._get_fallback_rate('UNKNOWN', 'USD')
         assert rate is None
     
+    def test_fetch_rate_from_api_first_usable_answer(self):
+        """Test that a failing or empty API doesn't block the others"""
+        mock_session = Mock()
+        converter = CurrencyConverter(mock_session)
+        converter._fetch_from_exchangerate_api = Mock(side_effect=Exception("timeout"))
+        converter._fetch_from_fixer_io = Mock(return_value=None)
+        converter._fetch_from_free_forex_api = Mock(return_value=1.08)
+        
+        rate = converter._fetch_rate_from_api('EUR', 'USD')
+        assert rate == 1.08
+    
+    def test_exchange_rate_memory_cache(self):
+        """Test that a resolved rate is reused across instances without the DB"""
+        CurrencyConverter.clear_rate_cache()
+        
+        first = CurrencyConverter(Mock())
+        first._get_cached_rate = Mock(return_value=0.85)
+        assert first.get_exchange_rate('EUR', 'USD') == 0.85
+        
+        second = CurrencyConverter(Mock())
+        second._get_cached_rate = Mock(return_value=None)
+        assert second.get_exchange_rate('EUR', 'USD') == 0.85
+        second._get_cached_rate.assert_not_called()
+        
+        CurrencyConverter.clear_rate_cache()
+    
+    def test_free_forex_api_without_success_flag(self):
+        """Test exchangerate.host results are used even without a 'success' field"""
+        converter = CurrencyConverter(Mock())
+        response = Mock()
+        response.content = b'{"query": {"from": "EUR", "to": "USD"}, "result": "1.08"}'
+        
+        with patch('src.analysis.currency_converter._http.get', return_value=response):
+            assert converter._fetch_from_free_forex_api('EUR', 'USD') == 1.08
+    
+    def test_load_rates_as_dict(self):
+        """Test resolving each distinct currency rate once"""
+        mock_session = Mock()
+        converter = CurrencyConverter(mock_session)
+        converter.get_exchange_rate = Mock(return_value=0.85)
+
+        rates = converter.load_rates_as_dict(['EUR', 'USD', 'EUR'])
+
+        assert rates == {'EUR': 0.85, 'USD': 1.0}
+        converter.get_exchange_rate.assert_called_once_with('EUR', 'USD')
+
+    def test_bulk_convert_to_usd(self):
+        """Test batch conversion keeps input order and marks unknown rates"""
+        mock_session = Mock()
+        converter = CurrencyConverter(mock_session)
+        converter.get_exchange_rate = Mock(side_effect=lambda c, t: {'EUR': 0.8}.get(c))
+        
+        results = converter.bulk_convert_to_usd([
+            (80.0, 'EUR', 0),
+            (100.0, 'USD', 1),
+            (50.0, 'XYZ', 2),
+            (40.0, 'EUR', 3)
+        ])
+        
+        assert results == [100.0, 100.0, None, 50.0]
+        converter.get_exchange_rate.assert_any_call('EUR', 'USD')
+        assert converter.get_exchange_rate.call_count == 2
+    
+    def test_update_fallback_rates_uses_latest(self):
+        """Test fallback rates are refreshed from the newest stored rate per currency"""
+        from src.database import DatabaseManager, ExchangeRate
+        
+        db_manager = DatabaseManager('sqlite:///:memory:')
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            now = datetime.utcnow()
+            session.add_all([
+                ExchangeRate(from_currency='EUR', to_currency='USD', rate=0.90, date=now - timedelta(days=2)),
+                ExchangeRate(from_currency='EUR', to_currency='USD', rate=0.92, date=now),
+                ExchangeRate(from_currency='JPY', to_currency='USD', rate=150.0, date=now),
+                ExchangeRate(from_currency='EUR', to_currency='GBP', rate=0.5, date=now),
+            ])
+            session.commit()
+            
+            converter = CurrencyConverter(session)
+            converter.update_fallback_rates()
+            
+            assert converter.fallback_rates['EUR'] == 0.92
+            assert converter.fallback_rates['JPY'] == 150.0
+            assert converter.fallback_rates['INR'] == 75.0
+    
     def test_get_supported_currencies(self):
         """Test getting supported currencies"""
         mock_session = Mock()
@@ -79,80 +167,6 @@ class TestPriceAnalyzer:
         
         assert analyzer.db_session == mock_session
         assert analyzer.price_change_threshold == 5.0
-    
-    def test_determine_trend_direction_stable(self):
-        """Test trend direction determination for stable prices"""
-        mock_session = Mock()
-        analyzer = PriceAnalyzer(mock_session)
-        
-        # Create mock DataFrame with stable prices
-        import pandas as pd
-        df = pd.DataFrame({
-            'price_usd': [100.0, 101.0, 99.5, 100.5, 100.2]
-        })
-        
-        trend = analyzer._determine_trend_direction(df)
-        assert trend == 'stable'
-    
-    def test_determine_trend_direction_up(self):
-        """Test trend direction determination for increasing prices"""
-        mock_session = Mock()
-        analyzer = PriceAnalyzer(mock_session)
-        
-        import pandas as pd
-        df = pd.DataFrame({
-            'price_usd': [100.0, 105.0, 110.0, 115.0, 120.0]
-        })
-        
-        trend = analyzer._determine_trend_direction(df)
-        assert trend == 'up'
-    
-    def test_determine_trend_direction_down(self):
-        """Test trend direction determination for decreasing prices"""
-        mock_session = Mock()
-        analyzer = PriceAnalyzer(mock_session)
-        
-        import pandas as pd
-        df = pd.DataFrame({
-            'price_usd': [120.0, 115.0, 110.0, 105.0, 100.0]
-        })
-        
-        trend = analyzer._determine_trend_direction(df)
-        assert trend == 'down'
-    
-    def test_calculate_confidence_score(self):
-        """Test confidence score calculation"""
-        mock_session = Mock()
-        analyzer = PriceAnalyzer(mock_session)
-        
-        import pandas as pd
-        import numpy as np
-        
-        # Create mock DataFrame with good data (many points, low volatility, recent)
-        now = datetime.utcnow()
-        timestamps = [now - timedelta(days=i) for i in range(20)]
-        
-        df = pd.DataFrame({
-            'price_usd': [100 + np.random.normal(0, 1) for _ in range(20)],
-            'timestamp': pd.to_datetime(timestamps)
-        })
-        
-        volatility = df['price_usd'].std()
-        confidence = analyzer._calculate_confidence_score(df, volatility)
-        
-        assert 0.0 <= confidence <= 1.0
-        assert confidence > 0.5  # Should be high confidence with good data
-    
-    def test_calculate_confidence_score_low_data(self):
-        """Test confidence score with insufficient data"""
-        mock_session = Mock()
-        analyzer = PriceAnalyzer(mock_session)
-        
-        import pandas as pd
-        df = pd.DataFrame({'price_usd': [100.0]})  # Only one data point
-        
-        confidence = analyzer._calculate_confidence_score(df, 0.0)
-        assert confidence == 0.3  # Should return default low confidence
 
 
 class TestPriceAnalysis:
@@ -231,33 +245,17 @@ class TestPriceAnalyzerQueries:
     
     def test_generate_market_summary(self, mock_analyzer):
         """Test market summary generation"""
-        # Mock database queries
-        mock_analyzer.db_session.query.return_value.count.return_value = 1000
-        mock_analyzer.db_session.query.return_value.filter.return_value.count.return_value = 150
-        
-        # Mock brand averages query
-        brand_avg_mock = Mock()
-        brand_avg_mock.all.return_value = [
-            Mock(brand='Apple', avg_price=Decimal('800.00')),
-            Mock(brand='Samsung', avg_price=Decimal('700.00')),
-        ]
-        mock_analyzer.db_session.query.return_value.join.return_value.filter.return_value.group_by.return_value = brand_avg_mock
-        
-        # Mock popular models query
-        popular_mock = Mock()
-        popular_mock.limit.return_value.all.return_value = [
-            Mock(brand='Apple', model_name='iPhone 16', record_count=50),
-            Mock(brand='Samsung', model_name='Galaxy S24', record_count=40),
+        # All summary aggregates come back as rows of one statement
+        mock_analyzer.db_session.execute.return_value.all.return_value = [
+            Mock(kind='total', label=None, detail=None, record_count=1000, avg_price=None),
+            Mock(kind='recent', label=None, detail=None, record_count=150, avg_price=None),
+            Mock(kind='brand', label='Apple', detail=None, record_count=None, avg_price=Decimal('800.00')),
+            Mock(kind='brand', label='Samsung', detail=None, record_count=None, avg_price=Decimal('700.00')),
+            Mock(kind='model', label='Samsung', detail='Galaxy S24', record_count=40, avg_price=None),
+            Mock(kind='model', label='Apple', detail='iPhone 16', record_count=50, avg_price=None),
+            Mock(kind='platform', label='Back Market', detail=None, record_count=50, avg_price=None),
+            Mock(kind='platform', label='Swappa', detail=None, record_count=60, avg_price=None),
         ]
-        mock_analyzer.db_session.query.return_value.join.return_value.filter.return_value.group_by.return_value.order_by.return_value = popular_mock
-        
-        # Mock platform activity query  
-        platform_mock = Mock()
-        platform_mock.all.return_value = [
-            Mock(name='Swappa', record_count=60),
-            Mock(name='Back Market', record_count=50),
-        ]
-        mock_analyzer.db_session.query.return_value.join.return_value.filter.return_value.group_by.return_value.order_by.return_value = platform_mock
         
         summary = mock_analyzer.generate_market_summary()
         
@@ -268,6 +266,202 @@ class TestPriceAnalyzerQueries:
         assert 'popular_models' in summary
         assert 'platform_activity' in summary
         assert 'last_updated' in summary
+        assert mock_analyzer.db_session.execute.call_count == 1
+        assert summary['total_records'] == 1000
+        assert summary['recent_records'] == 150
+        assert summary['brand_avg_prices'] == {'Apple': 800.0, 'Samsung': 700.0}
+        assert summary['popular_models'] == [('Apple', 'iPhone 16', 50), ('Samsung', 'Galaxy S24', 40)]
+        assert summary['platform_activity'] == [('Swappa', 60), ('Back Market', 50)]
+
+
+class TestPriceTrendAnalysis:
+    """Test analyze_price_trends against a real (in-memory) database"""
+    
+    @pytest.fixture
+    def seeded_session(self):
+        """Create an in-memory database with a short price history"""
+        from src.database import DatabaseManager
+        
+        db_manager = DatabaseManager('sqlite:///:memory:')
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            swappa = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            rebuy = Platform(name='Rebuy', region='Europe', base_url='https://rebuy.de', scraper_type='html')
+            session.add_all([phone, swappa, rebuy])
+            session.flush()
+            
+            now = datetime.utcnow()
+            for days_ago, price in [(20, 800.0), (12, 820.0), (6, 850.0), (3, 880.0), (1, 900.0)]:
+                session.add(PriceRecord(
+                    phone_model_id=phone.id, platform_id=swappa.id, condition='Good',
+                    price=price, currency='USD', price_usd=price,
+                    scrape_timestamp=now - timedelta(days=days_ago)
+                ))
+            
+            # Too little history to analyze, and a row outside the window
+            session.add(PriceRecord(
+                phone_model_id=phone.id, platform_id=rebuy.id, condition='Good',
+                price=700.0, currency='EUR', price_usd=800.0, scrape_timestamp=now - timedelta(days=2)
+            ))
+            session.add(PriceRecord(
+                phone_model_id=phone.id, platform_id=rebuy.id, condition='Good',
+                price=650.0, currency='EUR', price_usd=760.0, scrape_timestamp=now - timedelta(days=60)
+            ))
+            session.commit()
+            
+            yield session
+    
+    def test_analyze_price_trends(self, seeded_session):
+        """Test per-combination metrics from stored price history"""
+        analyzer = PriceAnalyzer(seeded_session)
+        
+        analyses = analyzer.analyze_price_trends(days_back=30)
+        
+        assert len(analyses) == 1
+        analysis = analyses[0]
+        assert (analysis.brand, analysis.phone_model, analysis.storage) == ('Apple', 'iPhone 16', '128GB')
+        assert (analysis.platform, analysis.region, analysis.condition) == ('Swappa', 'US', 'Good')
+        assert analysis.current_price == 900.0
+        assert analysis.previous_price == 880.0
+        assert analysis.price_change_amount == pytest.approx(20.0)
+        assert analysis.price_change_percent == pytest.approx(20.0 / 880.0 * 100)
+        assert analysis.avg_price_7d == pytest.approx((850.0 + 880.0 + 900.0) / 3)
+        assert analysis.avg_price_30d == pytest.approx(850.0)
+        assert analysis.min_price_7d == 850.0
+        assert analysis.max_price_7d == 900.0
+        assert analysis.volatility == pytest.approx(np.std([800.0, 820.0, 850.0, 880.0, 900.0], ddof=1))
+        assert analysis.trend_direction == 'up'
+        assert analysis.confidence_score == pytest.approx(0.58786, abs=1e-4)
+    
+    def test_analyze_price_trends_keeps_exact_cents(self):
+        """Test reported prices are not rounded through float32"""
+        from src.database import DatabaseManager
+        
+        db_manager = DatabaseManager('sqlite:///:memory:')
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16 Pro Max', storage_capacity='1TB')
+            swappa = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, swappa])
+            session.flush()
+            
+            now = datetime.utcnow()
+            for days_ago, price in [(5, 1249.95), (3, 1234.56), (1, 1299.99)]:
+                session.add(PriceRecord(
+                    phone_model_id=phone.id, platform_id=swappa.id, condition='Good',
+                    price=price, currency='USD', price_usd=price,
+                    scrape_timestamp=now - timedelta(days=days_ago)
+                ))
+            session.commit()
+            
+            analysis = PriceAnalyzer(session).analyze_price_trends(days_back=30)[0]
+        
+        assert analysis.current_price == 1299.99
+        assert analysis.previous_price == 1234.56
+        assert round(analysis.price_change_amount, 2) == 65.43
+        assert analysis.price_change_amount == 1299.99 - 1234.56
+        assert analysis.min_price_7d == 1234.56
+        assert analysis.max_price_7d == 1299.99
+    
+    def test_analyze_price_trends_zero_previous_price(self):
+        """Test a zero previous price reports no change instead of inf/NaN"""
+        from src.database import DatabaseManager
+        
+        db_manager = DatabaseManager('sqlite:///:memory:')
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            swappa = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, swappa])
+            session.flush()
+        
+            now = datetime.utcnow()
+            for days_ago, price in [(3, 0.0), (1, 799.0)]:
+                session.add(PriceRecord(
+                    phone_model_id=phone.id, platform_id=swappa.id, condition='Good',
+                    price=price, currency='USD', price_usd=price,
+                    scrape_timestamp=now - timedelta(days=days_ago)
+                ))
+            session.commit()
+        
+            analysis = PriceAnalyzer(session).analyze_price_trends(days_back=30)[0]
+        
+        assert analysis.previous_price == 0.0
+        assert analysis.price_change_amount == 0.0
+        assert analysis.price_change_percent == 0.0
+    
+    def test_analyze_price_trends_frame(self, seeded_session):
+        """Test the columnar result matches the PriceAnalysis objects"""
+        analyzer = PriceAnalyzer(seeded_session)
+        
+        frame = analyzer.analyze_price_trends_frame(days_back=30)
+        
+        assert list(frame.columns) == list(PriceAnalysis.__dataclass_fields__)
+        assert frame.to_dict('records') == [vars(a) for a in analyzer.analyze_price_trends(days_back=30)]
+    
+    def test_find_arbitrage_opportunities(self, seeded_session):
+        """Test that only the cheapest/dearest latest prices form an opportunity"""
+        analyzer = PriceAnalyzer(seeded_session)
+        
+        insights = analyzer.find_arbitrage_opportunities(min_profit_percent=10.0)
+        
+        assert len(insights) == 1
+        assert insights[0].platform == 'Rebuy → Swappa'
+        assert insights[0].region == 'Europe → US'
+        assert insights[0].value == pytest.approx(12.5)
+        assert analyzer.find_arbitrage_opportunities(min_profit_percent=15.0) == []
+    
+    def test_find_significant_price_changes(self, seeded_session):
+        """Test weekly trend changes are reported with joined model/platform names"""
+        from src.database import PriceTrend
+        
+        phone = seeded_session.query(PhoneModel).one()
+        rebuy = seeded_session.query(Platform).filter_by(name='Rebuy').one()
+        seeded_session.add_all([
+            PriceTrend(phone_model_id=phone.id, platform_id=rebuy.id, condition='Good', trend_period='weekly',
+                       current_price_usd=800.0, price_change_percent=-12.0),
+            PriceTrend(phone_model_id=phone.id, platform_id=rebuy.id, condition='Fair', trend_period='weekly',
+                       current_price_usd=700.0, price_change_percent=3.0)
+        ])
+        seeded_session.commit()
+        
+        insights = PriceAnalyzer(seeded_session).find_significant_price_changes(min_change_percent=10.0)
+        
+        assert len(insights) == 1
+        assert insights[0].insight_type == 'price_drop'
+        assert insights[0].description == 'Price dropped by 12.0% on Rebuy to $800.00'
+        assert (insights[0].phone_model, insights[0].region) == ('Apple iPhone 16', 'Europe')
+    
+    def test_generate_market_summary_single_query(self, seeded_session):
+        """Test summary aggregates computed from the combined statement"""
+        analyzer = PriceAnalyzer(seeded_session)
+        
+        summary = analyzer.generate_market_summary()
+        
+        assert summary['total_records'] == 7
+        assert summary['recent_records'] == 4
+        assert summary['brand_avg_prices'] == {'Apple': pytest.approx((850.0 + 880.0 + 900.0 + 800.0) / 4)}
+        assert summary['popular_models'] == [('Apple', 'iPhone 16', 4)]
+        assert summary['platform_activity'] == [('Swappa', 3), ('Rebuy', 1)]
+    
+    def test_trend_kernel_matches_numpy(self):
+        """Test the compiled trend kernel against NumPy reference values"""
+        from src.analysis._kernels import segment_trend_stats
+        
+        prices = np.array([800.0, 820.0, 850.0, 880.0, 900.0, 500.0, 450.0])
+        days = np.array([0.0, 8.0, 14.0, 17.0, 19.5, 3.0, 5.0])
+        stats = segment_trend_stats(prices, days, np.array([0, 5]), np.array([5, 7]))
+        
+        slope, mean, std, low, high, days_span = stats[0]
+        assert slope == pytest.approx(np.polyfit(np.arange(5), prices[:5], 1)[0])
+        assert mean == pytest.approx(prices[:5].mean())
+        assert std == pytest.approx(np.std(prices[:5], ddof=1))
+        assert (low, high, days_span) == (800.0, 900.0, 19.0)
+        assert stats[1][0] == pytest.approx(-50.0)
 
 
 class TestAnalysisIntegration:
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 import tempfile
 import os
 
-from src.database import DatabaseManager, PhoneModel, Platform, PriceRecord, init_database
+from src.database import DatabaseManager, PhoneModel, Platform, PriceRecord, DailyPriceRollup, init_database, new_session_id
 
 
 class TestDatabaseModels:
@@ -97,6 +97,36 @@ class TestDatabaseManager:
         # Test that we can connect
         assert db_manager.test_connection() is True
     
+    def test_sqlite_pragmas(self, temp_db):
+        """Test that SQLite connections are opened in WAL mode"""
+        from sqlalchemy import text
+        
+        db_manager = DatabaseManager(temp_db)
+        
+        with db_manager.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    
+    def test_ensure_indexes_on_existing_tables(self, temp_db):
+        """Test that indexes added to models are created on pre-existing tables"""
+        from sqlalchemy import inspect, text
+        
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ux_phone_model_key"))
+            conn.execute(text("CREATE INDEX idx_scrape_timestamp ON price_records (scrape_timestamp)"))
+        
+        db_manager.create_tables()
+        
+        index_names = {index['name'] for index in inspect(db_manager.engine).get_indexes('phone_models')}
+        assert 'ux_phone_model_key' in index_names
+        
+        price_indexes = {index['name'] for index in inspect(db_manager.engine).get_indexes('price_records')}
+        assert 'idx_pr_time_model_platform' in price_indexes
+        assert 'idx_scrape_timestamp' not in price_indexes
+    
     def test_get_session_context_manager(self, temp_db):
         """Test session context manager"""
         db_manager = DatabaseManager(temp_db)
@@ -143,6 +173,25 @@ class TestDatabaseManager:
             saved_phone = session.query(PhoneModel).filter_by(brand='Test').first()
             assert saved_phone is None
     
+    def test_nested_get_session_keeps_outer_transaction(self, temp_db):
+        """Test a nested get_session neither commits nor closes the outer session"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as outer:
+            outer.add(PhoneModel(brand='Outer', model_name='Model', storage_capacity='128GB'))
+            outer.flush()
+            
+            with db_manager.get_session() as inner:
+                assert inner is outer
+            
+            # Still the same open transaction after the inner block
+            assert outer.in_transaction()
+            assert outer.query(PhoneModel).filter_by(brand='Outer').count() == 1
+        
+        with db_manager.get_session(read_only=True) as session:
+            assert session.query(PhoneModel).filter_by(brand='Outer').count() == 1
+    
     def test_init_default_data(self, temp_db):
         """Test initialization of default data"""
         db_manager = DatabaseManager(temp_db)
@@ -176,6 +225,23 @@ class TestDatabaseManager:
             assert swappa is not None
             assert swappa.region == 'US'
     
+    def test_init_default_data_is_idempotent(self, temp_db):
+        """Test that re-running default data initialization adds no duplicates"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with patch('src.database.database.PHONE_MODELS', {'apple': {'iPhone 16': ['128GB', '256GB']}}), \
+             patch('src.database.database.PLATFORMS', {
+                 'US': {'Swappa': {'base_url': 'https://swappa.com', 'scraper_type': 'html', 'rate_limit': 1.0}}
+             }):
+            db_manager.init_default_data()
+            db_manager.init_default_data()
+        
+        with db_manager.get_session() as session:
+            assert session.query(PhoneModel).count() == 2
+            assert session.query(Platform).count() == 1
+            assert session.query(Platform).one().is_active is True
+    
     def test_save_price_records(self, temp_db):
         """Test saving price records"""
         db_manager = DatabaseManager(temp_db)
@@ -218,7 +284,8 @@ class TestDatabaseManager:
                 }
             ]
             
-            success = db_manager.save_price_records(session, price_records, 'test_session')
+            session_id = new_session_id()
+            success = db_manager.save_price_records(session, price_records, session_id)
             assert success is True
             
             # Verify records were saved
@@ -226,7 +293,61 @@ class TestDatabaseManager:
             assert len(saved_records) == 2
             
             for record in saved_records:
-                assert record.scrape_session_id == 'test_session'
+                assert record.scrape_session_id == session_id
+    
+    def test_save_price_records_in_chunks(self, temp_db):
+        """Test saving records across several insert chunks"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            platform = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, platform])
+            session.flush()
+            
+            price_records = [{
+                'phone_model_id': phone.id,
+                'platform_id': platform.id,
+                'condition': 'Good',
+                'price': 700.0 + i,
+                'currency': 'USD'
+            } for i in range(5)]
+            
+            session_id = new_session_id()
+            success = db_manager.save_price_records(session, price_records, session_id, chunk_size=2)
+            assert success is True
+            assert session.query(PriceRecord).filter_by(scrape_session_id=session_id).count() == 5
+    
+    def test_price_record_relationships_require_eager_loading(self, temp_db):
+        """Test that relationships must be loaded explicitly instead of lazily"""
+        from sqlalchemy.exc import InvalidRequestError
+        from sqlalchemy.orm import joinedload
+        
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            platform = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, platform])
+            session.flush()
+            session.add(PriceRecord(
+                phone_model_id=phone.id, platform_id=platform.id, condition='Good', price=699.99, currency='USD'
+            ))
+            session.commit()
+            session.expunge_all()
+            
+            record = session.query(PriceRecord).one()
+            with pytest.raises(InvalidRequestError):
+                record.phone_model
+            
+            session.expunge_all()
+            record = session.query(PriceRecord).options(
+                joinedload(PriceRecord.phone_model), joinedload(PriceRecord.platform)
+            ).one()
+            assert record.phone_model.model_name == 'iPhone 16'
+            assert record.platform.name == 'Swappa'
     
     def test_get_phone_models(self, temp_db):
         """Test getting phone models"""
@@ -260,6 +381,40 @@ class TestDatabaseManager:
             all_models = db_manager.get_phone_models(session, active_only=False)
             assert len(all_models) == 2
     
+    def test_get_record_stats(self, temp_db):
+        """Test combined record/model/platform counts"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            inactive_phone = PhoneModel(
+                brand='Apple', model_name='iPhone 15', storage_capacity='128GB', is_active=False
+            )
+            platform = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, inactive_phone, platform])
+            session.flush()
+
+            for days_ago in (1, 30):
+                session.add(PriceRecord(
+                    phone_model_id=phone.id,
+                    platform_id=platform.id,
+                    condition='Good',
+                    price=699.99,
+                    currency='USD',
+                    scrape_timestamp=datetime.utcnow() - timedelta(days=days_ago)
+                ))
+            session.commit()
+
+            stats = db_manager.get_record_stats(session, recent_days=7)
+
+            assert stats == {
+                'total_records': 2,
+                'recent_records': 1,
+                'active_models': 1,
+                'active_platforms': 1
+            }
+
     def test_cleanup_old_records(self, temp_db):
         """Test cleanup of old price records"""
         db_manager = DatabaseManager(temp_db)
@@ -306,6 +461,85 @@ class TestDatabaseManager:
             assert len(remaining_records) == 1
             assert remaining_records[0].scrape_timestamp > (datetime.utcnow() - timedelta(days=90))
 
+    
+    def test_cleanup_old_records_in_batches(self, temp_db):
+        """Test that cleanup deletes across several batches"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            platform = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, platform])
+            session.flush()
+            
+            for days_ago in (120, 110, 100, 95, 92, 10):
+                session.add(PriceRecord(
+                    phone_model_id=phone.id,
+                    platform_id=platform.id,
+                    condition='Good',
+                    price=699.99,
+                    currency='USD',
+                    scrape_timestamp=datetime.utcnow() - timedelta(days=days_ago)
+                ))
+            session.commit()
+            
+            assert db_manager.cleanup_old_records(session, keep_days=90, batch_size=2) == 5
+            assert session.query(PriceRecord).count() == 1
+    
+    def test_cleanup_old_records_prunes_daily_rollups(self, temp_db):
+        """Test that cleanup also removes rollup days older than the cutoff"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            platform = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, platform])
+            session.commit()
+        
+            records = [
+                {'phone_model_id': phone.id, 'platform_id': platform.id, 'condition': 'Good',
+                 'price': 650.0, 'currency': 'USD', 'price_usd': 650.0,
+                 'scrape_timestamp': datetime.utcnow() - timedelta(days=days_ago)}
+                for days_ago in (120, 100, 10)
+            ]
+            assert db_manager.save_price_records(session, records)
+            assert session.query(DailyPriceRollup).count() == 3
+        
+            db_manager.cleanup_old_records(session, keep_days=90, batch_size=1)
+        
+            remaining = session.query(DailyPriceRollup).all()
+            assert [rollup.day for rollup in remaining] == [records[2]['scrape_timestamp'].date()]
+    
+    def test_save_price_records_refreshes_daily_rollups(self, temp_db):
+        """Test that saved records are folded into the daily rollups"""
+        db_manager = DatabaseManager(temp_db)
+        db_manager.create_tables()
+        
+        with db_manager.get_session() as session:
+            phone = PhoneModel(brand='Apple', model_name='iPhone 16', storage_capacity='128GB')
+            platform = Platform(name='Swappa', region='US', base_url='https://swappa.com', scraper_type='html')
+            session.add_all([phone, platform])
+            session.commit()
+            
+            yesterday = datetime.utcnow() - timedelta(days=1)
+            records = [
+                {'phone_model_id': phone.id, 'platform_id': platform.id, 'condition': 'Good',
+                 'price': price, 'currency': 'USD', 'price_usd': price, 'scrape_timestamp': timestamp}
+                for price, timestamp in ((600.0, yesterday), (700.0, yesterday), (650.0, None))
+            ]
+            records[2].pop('scrape_timestamp')
+            
+            assert db_manager.save_price_records(session, records)
+            
+            rollups = session.query(DailyPriceRollup).order_by(DailyPriceRollup.day).all()
+            assert [rollup.record_count for rollup in rollups] == [2, 1]
+            assert rollups[0].day == yesterday.date()
+            assert rollups[0].sum_usd == 1300.0
+            assert rollups[0].sum_sq_usd == 600.0 ** 2 + 700.0 ** 2
+            assert (rollups[0].min_usd, rollups[0].max_usd) == (600.0, 700.0)
+
 
 class TestInitDatabase:
     """Test database initialization function"""
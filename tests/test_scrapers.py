@@ -80,6 +80,28 @@ class TestBaseScraper:
         assert scraper.rate_limit == 2.0
         assert scraper.scraper_type == 'html'
     
+    @pytest.mark.asyncio
+    async def test_shared_session_headers_stay_per_scraper(self):
+        """Test scrapers sharing an HTTP session send their own headers without mutating it"""
+        http_session = Mock()
+        http_session.headers = {}
+        first = MockScraper({'name': 'A', 'base_url': 'http://a.com', 'region': 'US', 'rate_limit': 0},
+                            http_session=http_session)
+        second = MockScraper({'name': 'B', 'base_url': 'http://b.com', 'region': 'UK', 'rate_limit': 0},
+                             http_session=http_session)
+        first.headers['User-Agent'] = 'agent-a'
+        second.headers['User-Agent'] = 'agent-b'
+        
+        with patch('src.scrapers.base_scraper.random.random', return_value=0.5):
+            await first._make_request('http://a.com/x', headers={'Referer': 'http://a.com'})
+            await second._make_request('http://b.com/x')
+        
+        first_call, second_call = http_session.get.call_args_list
+        assert first_call.kwargs['headers']['User-Agent'] == 'agent-a'
+        assert first_call.kwargs['headers']['Referer'] == 'http://a.com'
+        assert second_call.kwargs['headers']['User-Agent'] == 'agent-b'
+        assert http_session.headers == {}
+    
     def test_parse_price_valid(self):
         """Test price parsing with valid input"""
         scraper = MockScraper({'name': 'Test', 'base_url': 'http://test.com', 'region': 'US'})